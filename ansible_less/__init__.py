@@ -1,22 +1,461 @@
 """Parses ansible log files and removes the boring 'it worked' bits."""
 
 from __future__ import annotations
-from logging import debug
-from collections import defaultdict
+from logging import debug, warning
+from collections import defaultdict, deque
+from itertools import islice
+from typing import Iterable, Iterator, NamedTuple
+import codecs
+import fnmatch
+import hashlib
+import heapq
+import io
+import logging
+import mmap
+import os
 import re
+import select
+import stat
 import sys
+import time
+
+from ansible_less.checkpoint import load_checkpoint, save_checkpoint
+from ansible_less.readers import StreamDecompressor, detect_compression, open_log
+from ansible_less.renderers import CapturedRenderer, renderer_for
+from ansible_less.spill import TRUNCATE_BATCH_LINES, SpilledLines, TruncatedLines
+from ansible_less.stats import Stats
+from ansible_less.templates import cluster_templates, fill_template
 
 __VERSION__ = "1.1"
 
-try:
-    from rich import print as pretty_print
-except Exception:
-    pretty_print = print
+# host statuses, from most to least interesting
+STATUS_ORDER = {"fatal": 0, "failed": 1, "changed": 2, "ok": 3, "skipping": 4}
+
+# the earlier statuses that a later, worse status for the same host replaces
+REPLACEMENT_STATUSES = {
+    "changed": {"ok": True, "skipping": True},
+    "failed": {"ok": True, "changed": True, "skipping": True},
+    "fatal": {"ok": True, "changed": True, "skipping": True, "failed": True},
+}
+
+# statuses whose hosts may be reported as a count (or as "all hosts")
+GROUPED_STATUSES = [
+    ("ok", "ok"),
+    ("skipping", "skipped"),
+    ("changed", "changed"),
+    ("failed", "failed"),
+    ("fatal", "fatal"),
+]
+
+# the words that start a new section of ansible output
+SECTION_WORDS = ["TASK", "HANDLER", "PLAY RECAP", "[WARNING]:"]
+
+# line kinds assigned by classify_line()
+KIND_BLANK = "blank"
+KIND_IGNORING = "ignoring"
+KIND_STATUS = "status"
+KIND_DATE = "date"
+KIND_HOST = "host"
+KIND_SEPARATOR = "separator"
+KIND_DIFF = "diff"
+KIND_TEXT = "text"
+
+DIFF_PREFIXES = ("--- ", "+++ ", "@@ ", "+", "-")
+
+SECTION_RE = re.compile(r"TASK|HANDLER|PLAY RECAP|\[WARNING\]:")
+SECTION_WORDS_BYTES = [word.encode() for word in SECTION_WORDS]
+
+# a TASK section must have a host with one of these statuses to be printed
+IMPORTANT_STATUSES = ["changed", "failed", "fatal"]
+
+# a section without any of these can never have changed/failed/fatal hosts
+IMPORTANT_STATUS_BYTES = [f"{status}: [".encode() for status in IMPORTANT_STATUSES]
+STATUS_RE = re.compile(r".*(changed|ok|failed|fatal|skipping): \[([^]]+)\]:*\s*(.*)")
+DATE_RE = re.compile(r"^\w+ \d+ \w+ \d+  \d{2}:\d{2}:\d{2}")
+HOST_RE = re.compile(r"^\[\w+\]$")
+SEPARATOR_RE = re.compile(r"^\[*=-]*$")
+
+FRACTIONAL_DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\.\d+")
+DELTA_RE = re.compile(r'("delta": "\d+:\d{2}:\d{2})\.\d+')
+AMTIME_RE = re.compile(r'("[am]time": \d+)\.\d+')
+TMPFILE_RE = re.compile(r"(.*after:.*/.ansible/tmp/)[^/]+.*/")
+
+# global inline flags, like the "(?i)" of "(?i)noisy"
+LEADING_FLAGS_RE = re.compile(r"\(\?([aiLmsux]+)\)")
+
+
+class ClassifiedLine(NamedTuple):
+    """A single log line, tokenized once so later passes needn't re-match it."""
+
+    line: str  # the original line
+    text: str  # the line with any '|' prefix stripped
+    clean: str  # text with surrounding whitespace and trailing '*'s removed
+    kind: str
+    status: str | None = None
+    host: str | None = None
+    suffix: str | None = None
+
+
+_new_record = tuple.__new__
+
+
+def merge_status(current: str, new: str) -> str:
+    """Return a host's status after it reports another result in the same task."""
+    if new in REPLACEMENT_STATUSES and current in REPLACEMENT_STATUSES[new]:
+        return new
+    return current
+
+
+def merge_groupings(groupings: dict[str, dict], new: dict[str, dict]) -> None:
+    """Merge one section's host groupings into another's."""
+    for host, grouping in new.items():
+        if host not in groupings:
+            groupings[host] = {
+                "status": grouping["status"],
+                "lines": list(grouping["lines"]),
+            }
+        else:
+            groupings[host]["lines"].extend(grouping["lines"])
+            groupings[host]["status"] = merge_status(
+                groupings[host]["status"], grouping["status"]
+            )
+
+
+def add_new_items(items: list, new: Iterable) -> None:
+    """Append the new items that aren't already in a list."""
+    for item in new:
+        if item not in items:
+            items.append(item)
+
+
+def lines_digest(lines: Iterable[str]) -> bytes:
+    """Return a digest of a list of lines for identifying identical output."""
+    return hashlib.blake2b(
+        "\0".join(lines).encode("utf-8", "surrogateescape"), digest_size=16
+    ).digest()
+
+
+def scoped_pattern(pattern: str) -> str:
+    """Wrap a regex so it can be joined with others into a single regex.
+
+    Global flags at its start, like "(?i)noisy", are only allowed at the
+    start of the whole regex, so they're scoped to it: "(?i:noisy)".
+    """
+    flags = ""
+    match = LEADING_FLAGS_RE.match(pattern)
+    while match:
+        flags += match.group(1)
+        pattern = pattern[match.end() :]
+        match = LEADING_FLAGS_RE.match(pattern)
+    # (in verbose patterns a trailing comment would hide the closing parenthesis)
+    end = "\n)" if "x" in flags else ")"
+    return f"(?{flags}:{pattern}{end}"
+
+
+def boring_regex(words: Iterable[str], patterns: Iterable[str] = ()) -> re.Pattern:
+    """Combine literal boring words and boring regexes into a single regex.
+
+    Lines are then checked for every pattern in one scan.
+    """
+    alternatives = [re.escape(word) for word in words] + [
+        scoped_pattern(pattern) for pattern in patterns
+    ]
+    # (with nothing to match, use a regex that never matches)
+    return re.compile("|".join(alternatives) or "(?!)")
+
+
+def strip_prefix(line: str) -> str:
+    """Remove a 'date pid user |' style prefix from a line."""
+    # equivalent to re.sub(r"^[^|]*\s*\| ", "", line)
+    bar = line.find("|")
+    if bar >= 0 and line[bar + 1 : bar + 2] == " ":
+        return line[bar + 2 :]
+    return line
+
+
+def classify_line(line: str) -> ClassifiedLine:
+    """Tokenize a line into a ClassifiedLine record."""
+    # note: tuple.__new__ skips the slower python-level NamedTuple.__new__
+    text = strip_prefix(line)
+    clean = text.strip().rstrip("*")
+
+    if clean == "":
+        kind = KIND_BLANK
+    elif "...ignoring" in text:
+        kind = KIND_IGNORING
+    elif ": [" in text and (results := STATUS_RE.match(text)):
+        return _new_record(
+            ClassifiedLine, (line, text, clean, KIND_STATUS, *results.groups())
+        )
+    elif DATE_RE.match(clean):
+        kind = KIND_DATE
+    elif HOST_RE.match(clean):
+        kind = KIND_HOST
+    elif SEPARATOR_RE.match(clean):
+        kind = KIND_SEPARATOR
+    elif text.startswith(DIFF_PREFIXES):
+        kind = KIND_DIFF
+    else:
+        kind = KIND_TEXT
+
+    return _new_record(ClassifiedLine, (line, text, clean, kind, None, None, None))
+
+
+def classify_record(line: str | ClassifiedLine) -> ClassifiedLine:
+    """Classify a line unless it already is a ClassifiedLine."""
+    return line if isinstance(line, ClassifiedLine) else classify_line(line)
+
+
+def section_words(line: str) -> list[str]:
+    """Return the words in a line that start new sections (usually none)."""
+    # a single precompiled search rules out nearly every line
+    if not SECTION_RE.search(line):
+        return []
+    return [
+        section_word
+        for section_word in SECTION_WORDS
+        if line.startswith(section_word) or f" {section_word} " in line
+    ]
+
+
+def decode_lines(data: bytes) -> list[str]:
+    """Decode bytes into lines the way a text mode file would."""
+    return io.StringIO(data.decode("utf-8", errors="replace"), newline=None).readlines()
+
+
+def iter_decoded_lines(
+    data: bytes | mmap.mmap, start: int, end: int, chunk_size: int = 1024 * 1024
+) -> Iterator[str]:
+    """Lazily decode a large range of bytes into lines, a chunk at a time."""
+    while start < end:
+        stop = end
+        if start + chunk_size < end:
+            # end the chunk after its last line (or after a line longer than it)
+            stop = data.rfind(b"\n", start, start + chunk_size) + 1 or (
+                data.find(b"\n", start + chunk_size, end) + 1 or end
+            )
+        yield from decode_lines(data[start:stop])
+        start = stop
+
+
+def iter_section_word_offsets(data: bytes | mmap.mmap, word: bytes) -> Iterator[int]:
+    """Yield the offset of every line where word starts a new section."""
+    # plain find() is several times faster than a regex over big buffers
+    position = data.find(word)
+    while position != -1:
+        before = data[position - 1 : position]
+        if position == 0 or before == b"\n":
+            yield position
+        elif before == b" " and data[position + len(word) : position + len(word) + 1] == b" ":
+            yield data.rfind(b"\n", 0, position) + 1
+        position = data.find(word, position + 1)
+
+
+def starts_line(data: bytes | mmap.mmap, position: int) -> bool:
+    """Decide whether text at position starts a line (perhaps after a '|' prefix)."""
+    line_start = data.rfind(b"\n", 0, position) + 1
+    return line_start == position or data[line_start:position].endswith(b"| ")
+
+
+def find_last_runs(data: bytes | mmap.mmap, runs: int) -> int:
+    """Return the offset where the last `runs` playbook runs in a log start.
+
+    Runs end with a PLAY RECAP and the next one starts at its first PLAY
+    line, so the log is searched backward from its end for them.  An
+    unfinished run at the end counts as a run.  0 is returned when the
+    log holds no more than `runs` runs.
+    """
+    end = len(data)
+    found = 0
+    recap = data.rfind(b"PLAY RECAP", 0, end)
+    while recap != -1:
+        if starts_line(data, recap):
+            # the first play of the run after this recap
+            play = data.find(b"PLAY [", recap, end)
+            while play != -1 and not starts_line(data, play):
+                play = data.find(b"PLAY [", play + 1, end)
+            if play != -1:
+                found += 1
+                if found == runs:
+                    return data.rfind(b"\n", 0, play) + 1
+            end = recap
+        recap = data.rfind(b"PLAY RECAP", 0, recap)
+    return 0
+
+
+def iter_section_offsets(data: bytes | mmap.mmap) -> Iterator[int]:
+    """Yield the offset of every line in data that starts a new section."""
+    last_offset = -1
+    for offset in heapq.merge(
+        *[iter_section_word_offsets(data, word) for word in SECTION_WORDS_BYTES]
+    ):
+        if offset != last_offset:
+            yield offset
+            last_offset = offset
+
+
+class Query:
+    """Task, host and status filters, checked before any grouping work.
+
+    Tasks are regexes searched for in the task line, hosts are glob
+    patterns and statuses are host statuses (like "failed").  A section
+    can only print if it matches the tasks and, unless all sections are
+    shown, a matching host had a matching changed/failed/fatal status.
+    """
+
+    def __init__(
+        self,
+        tasks: list[str] | None = None,
+        hosts: list[str] | None = None,
+        statuses: list[str] | None = None,
+        all_sections: bool = False,
+    ):
+        """Create a Query."""
+        # (configuration files may hold a single value rather than a list)
+        (tasks, hosts, statuses) = (
+            [value] if isinstance(value, str) else value
+            for value in (tasks, hosts, statuses)
+        )
+
+        self.task_re = (
+            re.compile("|".join(scoped_pattern(task) for task in tasks))
+            if tasks
+            else None
+        )
+        self.host_patterns = hosts
+        self.statuses = set(statuses) if statuses else None
+        self.host_cache: dict[str, bool] = {}
+
+        # only these statuses can make a section print
+        self.section_statuses = list(self.statuses or STATUS_ORDER)
+        if not all_sections:
+            self.section_statuses = [
+                status
+                for status in self.section_statuses
+                if status in IMPORTANT_STATUSES
+            ]
+
+        # some hosts' results are dropped when hosts or statuses are filtered
+        self.filters_hosts = bool(hosts or statuses)
+
+        # hosts need checking when any host or status might not print
+        self.checks_hosts = bool(self.filters_hosts or not all_sections)
+        alternatives = "|".join(self.section_statuses) or "(?!)"
+        self.status_re = re.compile(rf"(?:{alternatives}): \[([^\]]+)\]")
+        self.status_bytes_re = re.compile(self.status_re.pattern.encode())
+
+    def task_matches(self, line: str) -> bool:
+        """Decide whether a task line matches the task filters."""
+        return self.task_re is None or bool(self.task_re.search(strip_prefix(line)))
+
+    def host_matches(self, host: str) -> bool:
+        """Decide whether a host matches the host filters."""
+        if self.host_patterns is None:
+            return True
+        matches = self.host_cache.get(host)
+        if matches is None:
+            matches = self.host_cache[host] = any(
+                fnmatch.fnmatchcase(host, pattern) for pattern in self.host_patterns
+            )
+        return matches
+
+    def wants(self, host: str, status: str) -> bool:
+        """Decide whether a host's result should be shown."""
+        return (self.statuses is None or status in self.statuses) and (
+            self.host_matches(host)
+        )
+
+    def section_may_match(self, lines: list[str | ClassifiedLine]) -> bool:
+        """Cheaply decide, without classifying its lines, if a section may print.
+
+        Lines are searched in batches, so spilled sections stay on disk.
+        """
+        lines = iter(
+            line.line if isinstance(line, ClassifiedLine) else line for line in lines
+        )
+        first_line = next(lines, "")
+        if not self.task_matches(first_line):
+            return False
+        if not self.checks_hosts:
+            return True
+
+        # (a status result is on a single line, so batches can be searched alone)
+        batch = [first_line]
+        while batch:
+            text = "".join(batch)
+            if any(
+                self.host_matches(match.group(1))
+                for match in self.status_re.finditer(text)
+            ):
+                return True
+            batch = list(islice(lines, TRUNCATE_BATCH_LINES))
+        return False
+
+    def bytes_may_match(self, data: bytes | mmap.mmap, start: int, end: int) -> bool:
+        """Like section_may_match, for a section's lines after its first in data."""
+        if not self.checks_hosts:
+            return True
+        return any(
+            self.host_matches(match.group(1).decode("utf-8", errors="replace"))
+            for match in self.status_bytes_re.finditer(data, start, end)
+        )
+
+    def hosts_may_match(self, hosts: dict[str, list[str]]) -> bool:
+        """Decide from a section's important hosts by status if it may print."""
+        return any(
+            self.host_matches(host)
+            for status in self.section_statuses
+            for host in hosts.get(status, [])
+        )
+
+
+def follow_lines(input_file, poll_interval: float = 0.1) -> Iterator[str | None]:
+    """Yield lines from a growing file or pipe as soon as they are complete.
+
+    None is yielded each time `poll_interval` passes without new data so
+    callers can act on idle time.  Pipes end at EOF, while regular files
+    are followed until the caller stops.  Compressed input is
+    decompressed as it arrives.
+    """
+    fd = input_file.fileno()
+    is_regular_file = stat.S_ISREG(os.fstat(fd).st_mode)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    decompressor = None
+    started = False
+
+    while True:
+        # read the descriptor directly so no buffered lines hide from select()
+        if not is_regular_file:
+            readable, _, _ = select.select([fd], [], [], poll_interval)
+            if not readable:
+                yield None
+                continue
+
+        data = os.read(fd, 65536)
+        if not data:
+            if not is_regular_file:
+                break
+            yield None
+            time.sleep(poll_interval)
+            continue
+
+        if not started:
+            started = True
+            compression = detect_compression(data[:6])
+            if compression:
+                decompressor = StreamDecompressor(compression)
+        if decompressor:
+            data = decompressor.decompress(data)
 
-try:
-    import rich.console
-except Exception:
-    pass
+        lines = (pending + decoder.decode(data)).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + "\n"
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
 
 
 default_config = {
@@ -26,11 +465,22 @@ default_config = {
         "show_header": False,
         "show_trailer": False,
         "dont_strip_prefixes": False,
+        "boring_patterns": None,
+    },
+    "limits": {
+        "section_memory": 64,
+        "truncated_lines": 100,
     },
     "groupings": {
         "dont_use_groupings": False,
         "dont_group_oks": False,
         "dont_group_skipped": False,
+        "group_similar": False,
+    },
+    "filters": {
+        "tasks": None,
+        "hosts": None,
+        "statuses": None,
     },
 }
 
@@ -43,6 +493,8 @@ class AnsibleLess:
         config: dict | defaultdict = default_config,
         debug: bool = False,
         output_to: IO[str] = sys.stdout,
+        stats: Stats | None = None,
+        timings: TaskTimings | None = None,
     ):
         """Create an AnsibleLess instance."""
         self.printers = {
@@ -63,15 +515,39 @@ class AnsibleLess:
         self.status_prefix = config["display"]["status_prefix"]
         self.display_all_sections = config["display"]["all_sections"]
 
+        self.query = None
+        filters = {
+            name: self.setting("filters", name) for name in default_config["filters"]
+        }
+        if any(filters.values()):
+            self.query = Query(**filters, all_sections=self.display_all_sections)
+
+        # sections bigger than this (in characters) are spilled to disk
+        section_memory = self.setting("limits", "section_memory")
+        self.section_memory = int(section_memory * 1024 * 1024)
+        self.truncated_lines = self.setting("limits", "truncated_lines")
+
         self.display_by_groups = not config["groupings"]["dont_use_groupings"]
         self.group_oks = not config["groupings"]["dont_group_oks"]
         self.group_skipped = not config["groupings"]["dont_group_skipped"]
+        self.group_similar = self.setting("groupings", "group_similar")
 
         self.debug = debug
         self.output_to = output_to
+        self.stats = stats
+        self.timings = timings
 
+        # hostnames are interned to integer ids, so host sets can be bitsets
+        self.host_ids: dict[str, int] = {}
+        self.host_names: list[str] = []
         self.hosts = []
+        # set while a section is printed in parts (see flush_section())
+        self.section_flushed = False
 
+        boring_patterns = self.setting("display", "boring_patterns") or []
+        if isinstance(boring_patterns, str):  # (from a configuration file)
+            boring_patterns = [boring_patterns]
+        self.boring_patterns = boring_patterns
         self.boring_line_pieces = [
             "Gathering",
             "Facts",
@@ -79,9 +555,8 @@ class AnsibleLess:
             "PLAY",
             "skipping:",
             "Nothing to do",
+            *self.printers.keys(),
         ]
-        self.boring_line_pieces.extend(list(self.printers.keys()))
-
 
     @property
     def config(self):
@@ -92,6 +567,38 @@ class AnsibleLess:
     def config(self, newval):
         self._config = newval
 
+    @property
+    def boring_line_pieces(self) -> list[str]:
+        """Words that make a line boring when found in it.
+
+        Assign a new list to change them, so the boring regexes are rebuilt.
+        """
+        return self._boring_line_pieces
+
+    @boring_line_pieces.setter
+    def boring_line_pieces(self, newval: list[str]) -> None:
+        self._boring_line_pieces = newval
+        self.compile_boring_regexes()
+
+    @property
+    def boring_patterns(self) -> list[str]:
+        """Extra (site specific) regexes that make a line boring."""
+        return self._boring_patterns
+
+    @boring_patterns.setter
+    def boring_patterns(self, newval: list[str]) -> None:
+        self._boring_patterns = newval
+        if hasattr(self, "_boring_line_pieces"):
+            self.compile_boring_regexes()
+
+    def compile_boring_regexes(self) -> None:
+        """Compile the boring words and patterns for lines and for warnings."""
+        self.boring_re = boring_regex(self.boring_line_pieces, self.boring_patterns)
+        self.boring_warning_re = boring_regex(
+            [word for word in self.boring_line_pieces if word != "[WARNING]:"],
+            self.boring_patterns,
+        )
+
     @property
     def printers(self) -> dict[str, callable]:
         """The individual functions that do printing for a section."""
@@ -101,112 +608,218 @@ class AnsibleLess:
     def printers(self, newval: dict[str, callable]) -> None:
         self._printers = newval
 
-    def print(self, data):
-        if getattr(self.output_to, "print", None):
-            self.output_to.print(data)
-        else:
-            self.output_to.write(data)
+    @property
+    def hosts(self) -> list[str]:
+        """The full list of hosts, used for reporting "all hosts"."""
+        return self._hosts
+
+    @hosts.setter
+    def hosts(self, newval: list[str]) -> None:
+        self._hosts = newval
+        host_ids = [self.host_id(host) for host in newval]
+        self.all_hosts_bits = self.host_bits(host_ids)
+
+    def host_id(self, host: str) -> int:
+        """Return the integer id of a hostname, assigning one if it's new."""
+        host_id = self.host_ids.get(host)
+        if host_id is None:
+            host_id = self.host_ids[host] = len(self.host_names)
+            self.host_names.append(host)
+        return host_id
+
+    def intern_host(self, host: str) -> str:
+        """Return the one shared copy of a hostname."""
+        return self.host_names[self.host_id(host)]
+
+    def host_bits(self, host_ids: Iterable[int]) -> int:
+        """Return a bitset (as an int) of the given host ids."""
+        bitmap = bytearray(len(self.host_names) // 8 + 1)
+        for host_id in host_ids:
+            bitmap[host_id >> 3] |= 1 << (host_id & 7)
+        return int.from_bytes(bitmap, "little")
+
+    def status_host_ids(self, groupings: dict[str, dict]) -> dict[str, list[int]]:
+        """Return the ids of the hosts with each status in a section's groupings."""
+        host_id = self.host_id
+        status_ids: dict[str, list[int]] = {}
+        for host, grouping in groupings.items():
+            status_ids.setdefault(grouping["status"], []).append(host_id(host))
+        return status_ids
 
-    def escape(self, line: str) -> str:
-        if getattr(self.output_to, "print", None):
-            return rich.console.escape(line)
-        return line
+    @property
+    def output_to(self):
+        """Where output goes: a rich console or a plain text file."""
+        return self._output_to
+
+    @output_to.setter
+    def output_to(self, newval) -> None:
+        self._output_to = newval
+        self.renderer = renderer_for(newval)
+
+    def render(self, method: str, data) -> None:
+        """Hand data to one of the renderer's methods."""
+        stats = self.stats
+        if stats:
+            start = time.perf_counter()
+
+        getattr(self.renderer, method)(data)
+
+        if stats:
+            stats.add_time("render", start)
+
+    def print(self, data: str) -> None:
+        """Print data followed by a newline."""
+        self.render("print", data)
 
     def pretty_print(self, data):  ## TODO(hardaker): use rich for this printing
         self.print(data)
 
+    def classify_lines(
+        self, lines: list[str | ClassifiedLine]
+    ) -> list[ClassifiedLine]:
+        """Tokenize lines into ClassifiedLine records, keeping existing records.
+
+        Spilled sections stay on disk and are tokenized as they're read.
+        """
+        if isinstance(lines, SpilledLines):
+            return lines.map(classify_record)
+        return list(self.iter_classified(lines))
+
+    def iter_classified(
+        self, lines: Iterable[str | ClassifiedLine]
+    ) -> Iterator[ClassifiedLine]:
+        """Lazily tokenize lines into ClassifiedLine records."""
+        for line in lines:
+            yield line if isinstance(line, ClassifiedLine) else classify_line(line)
+
+    def display_text(self, record: ClassifiedLine) -> str:
+        """Return the text of a line as it should be displayed."""
+        if self.strip_prefixes:
+            return record.text
+        return record.line
+
     def clean_blanks(self, lines: list[str]) -> list[str]:
         """Drop trailing blank lines from a list of lines."""
-        while len(lines) > 0 and re.match(r"^\s*$", lines[-1]):
+        while len(lines) > 0 and lines[-1].strip() == "":
             lines.pop()
         return lines
 
-    def filter_lines(self, lines: list[str]) -> list[str]:
-        """Clean and filter lines to simplify the output.
+    def iter_without_trailing_blanks(self, lines: Iterable[str]) -> Iterator[str]:
+        """Lazily drop trailing blank lines, like clean_blanks does for lists."""
+        blanks = []
+        for line in lines:
+            if line.strip() == "":
+                # hold blanks back until we know something follows them
+                blanks.append(line)
+                continue
+            if blanks:
+                yield from blanks
+                blanks = []
+            yield line
 
-        - Drop lines containing just date strings.
-        - Drop line portions containing diffs of tmpfile names
-        - Simplify some timestamps
-        """
-        line_counter = 0
-        while line_counter < len(lines):
-            current_line = lines[line_counter]
+    def normalize_line(self, line: str) -> str:
+        """Simplify timestamps and tmpfile names so similar output aggregates."""
+        # every substitution below needs a '.' to match
+        if "." not in line:
+            return line
 
-            # drop date only lines
-            if re.match(r"^\w+ \d+ \w+ \d+  \d{2}:\d{2}:\d{2}", current_line):
-                lines.pop(line_counter)
-                # note: don't increment line counter here, as we want the same spot
-                continue
+        # shorten dates with fractional seconds for better aggregation
+        line = FRACTIONAL_DATE_RE.sub("\\1", line)
 
-            if re.match(r"^skipping: .*", current_line):
-                lines.pop(line_counter)
-                # note: don't increment line counter here, as we want the same spot
-                continue
+        # shorten delta times
+        if '"delta"' in line:
+            line = DELTA_RE.sub("\\1", line)
 
-            # shorten dates with fractional seconds for better aggregation
-            current_line = re.sub(
-                r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\.\d+", "\\1", current_line
-            )
+        # shorten atime/mtime sub-second changes
+        if 'time": ' in line:
+            line = AMTIME_RE.sub("\\1", line)
 
-            # shorten delta times
-            current_line = re.sub(
-                r'("delta": "\d+:\d{2}:\d{2})\.\d+', "\\1", current_line
-            )
+        # shorten tmp file names
+        if "ansible/tmp/" in line:
+            line = TMPFILE_RE.sub("\\1.../", line)
+
+        return line
 
-            # shorten atime/mtime sub-second changes
-            current_line = re.sub(r'("[am]time": \d+)\.\d+', "\\1", current_line)
+    def iter_filtered_lines(
+        self, lines: Iterable[str | ClassifiedLine], cleaned: bool = False
+    ) -> Iterator[str]:
+        """Lazily drop uninteresting lines and normalize the rest.
 
-            # shorten tmp file names
-            current_line = re.sub(
-                r"(.*after:.*/.ansible/tmp/)[^/]+.*/", "\\1.../", current_line
-            )
+        Yields the display text of each line, or its fully cleaned text
+        when `cleaned` is set.
+        """
+        for record in self.iter_classified(lines):
+            # drop date only lines
+            if record.kind == KIND_DATE:
+                continue
 
-            lines[line_counter] = current_line
+            if record.clean.startswith("skipping: "):
+                continue
 
-            line_counter += 1
+            if cleaned:
+                yield self.normalize_line(record.clean)
+            else:
+                yield self.normalize_line(self.display_text(record))
 
-        return self.clean_blanks(lines)
+    def filter_lines(self, lines: Iterable[str | ClassifiedLine]) -> list[str]:
+        """Clean and filter lines to simplify the output.
 
-    def group_by_hosts(self, lines: list[str]) -> dict[str, list[str]]:
-        """Take a collection of ansible log lines and group them by hostname."""
+        - Drop lines containing just date strings.
+        - Drop line portions containing diffs of tmpfile names
+        - Simplify some timestamps
+        """
+        return list(self.iter_without_trailing_blanks(self.iter_filtered_lines(lines)))
+
+    def group_by_hosts(
+        self, lines: Iterable[str | ClassifiedLine], truncate: bool = False
+    ) -> dict[str, list[str]]:
+        """Take a collection of ansible log lines and group them by hostname.
+
+        With `truncate` (for sections too big for memory), only the first
+        `truncated_lines` of each host's output are kept and the rest are
+        replaced by a marker with their count and digest.
+        """
         groupings = {}
         group_lines = []
         group_host = None
+        overflow = None
+        query = self.query
 
-        replacement_statuses = {
-            "changed": {"ok": True, "skipping": True},
-            "failed": {"ok": True, "changed": True, "skipping": True},
-            "fatal": {"ok": True, "changed": True, "skipping": True, "failed": True},
-        }
-
-        for n, line in enumerate(lines):
+        for record in self.iter_classified(lines):
+            line = self.display_text(record)
             if line == "":
                 continue
-            if "...ignoring" in line:
+            if record.kind == KIND_IGNORING and group_host is not None:
                 # this is actually for the previous host, not the next
-                groupings[group_host]["lines"].append(line)
+                if group_host in groupings:
+                    groupings[group_host]["lines"].append(line)
                 continue
-            if results := re.match(
-                r".*(changed|ok|failed|fatal|skipping): \[([^]]+)\]:*\s*(.*)", line
-            ):
-                # print("FOUND: " + results.group(1) + " -- " + results.group(2))
-                group_host = str(results.group(2))
-                status = str(results.group(1))
-                suffix = str(results.group(3))
+            if record.kind == KIND_STATUS:
+                if query and not query.wants(record.host, record.status):
+                    # drop the host's output without doing any work on it
+                    group_host = record.host
+                    group_lines = []
+                    overflow = None
+                    continue
+
+                group_host = self.intern_host(record.host)
+                status = record.status
+                suffix = record.suffix
+                filtered = self.iter_without_trailing_blanks(
+                    self.iter_filtered_lines(group_lines)
+                )
                 if group_host not in groupings:
-                    groupings[group_host] = {
-                        "status": status,
-                        "lines": self.filter_lines(group_lines),
-                    }
+                    host_lines = TruncatedLines(self.truncated_lines) if truncate else []
+                    groupings[group_host] = {"status": status, "lines": host_lines}
                 else:
                     # TODO(hardaker): what if there is an ok and a failure // take the worst and update the status!
-                    groupings[group_host]["lines"].extend(self.filter_lines(group_lines))
-                    if (
-                        status in replacement_statuses
-                        and groupings[group_host]["status"]
-                        in replacement_statuses[status]
-                    ):
-                        groupings[group_host]["status"] = status
+                    groupings[group_host]["status"] = merge_status(
+                        groupings[group_host]["status"], status
+                    )
+                if overflow is not None:
+                    groupings[group_host]["lines"].absorb(overflow)
+                    overflow = None
+                groupings[group_host]["lines"].extend(filtered)
 
                 # start collecting lines again for the next host
                 group_lines = []
@@ -214,11 +827,48 @@ class AnsibleLess:
                 if suffix != "" and status != "ok" and status != "skipping":
                     groupings[group_host]["lines"].append(suffix + "\n")
             else:
-                group_lines.append(line)
+                group_lines.append(record)
+                if truncate and len(group_lines) >= TRUNCATE_BATCH_LINES:
+                    # keep the output waiting for its status line bounded
+                    if overflow is None:
+                        overflow = TruncatedLines(self.truncated_lines)
+                    overflow.extend(self.iter_filtered_lines(group_lines))
+                    group_lines = []
+
+        if truncate:
+            for grouping in groupings.values():
+                grouping["lines"] = grouping["lines"].finish()
         # rich.print(groupings)
         return groupings
 
-    def check_important(self, lines: list[str]) -> bool:
+    def cluster_hosts(
+        self, groupings: dict[str, dict], hosts: Iterable[str] | None = None
+    ) -> list[list[str]]:
+        """Cluster hosts with identical output together.
+
+        Each host's lines are hashed once and hosts are grouped by that
+        digest, so identical output always collapses into one cluster.
+        Clusters are sorted by their worst status and then by size.
+        """
+        if hosts is None:
+            hosts = groupings
+
+        clusters: dict[bytes, list[str]] = {}
+        for host in hosts:
+            digest = lines_digest(groupings[host]["lines"])
+            clusters.setdefault(digest, []).append(host)
+
+        def cluster_order(cluster: list[str]) -> tuple[int, int]:
+            worst = min(
+                STATUS_ORDER.get(groupings[host]["status"], len(STATUS_ORDER))
+                for host in cluster
+            )
+            return (worst, -len(cluster))
+
+        # note: sorted() is stable, so ties stay in order of first appearance
+        return sorted(clusters.values(), key=cluster_order)
+
+    def check_important(self, lines: list[str | ClassifiedLine]) -> bool:
         """Decide which lines may indicate we need to display this section."""
         if self.display_all_sections:
             return True
@@ -227,38 +877,40 @@ class AnsibleLess:
 
         # find any line that we can't classify as boring, if so return True
         # note: stripping off prefixes
-        for line in self.clean_lines(lines):
-            line_is_boring: bool = False
-
+        records = self.classify_lines(lines)
+        boring_search = self.boring_re.search
+        # (logging calls are costly next to the checks, so skip them when unused)
+        logging_debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+        for record in records:
             # check empty
-            if line == "":
-                line_is_boring = True
+            if record.kind == KIND_BLANK:
                 continue  # just continue here, empty is boring
 
-            # check for boring words in a line
-            for word in self.boring_line_pieces:
-                if word in line:
-                    line_is_boring = True
-                    debug(f"found boring word: {word}")
-                    break
+            line = record.clean
 
-            # should be able to do this with a fancy for/else thingy
-            if line_is_boring:
-                continue  # it is
+            # check for boring words in a line
+            boring = boring_search(line)
+            if boring:
+                if logging_debug:
+                    debug("found boring word: %s", boring.group(0))
+                continue
 
             # check if it looks like a host line
-            if re.match(r"^\[\w+\]$", line):
-                debug("line is a host")
+            if record.kind == KIND_HOST:
+                if logging_debug:
+                    debug("line is a host")
                 continue
 
             # find display lines
-            if re.match(r"^\[*=-]*$", line):
-                debug("separator line")
+            if record.kind == KIND_SEPARATOR:
+                if logging_debug:
+                    debug("separator line")
                 continue
 
             # drop date only lines
-            if re.match(r"^\w+ \d+ \w+ \d+  \d{2}:\d{2}:\d{2}", line):
-                debug("date only line")
+            if record.kind == KIND_DATE:
+                if logging_debug:
+                    debug("date only line")
                 continue
 
             # this line isn't boring, thus the whole group is important
@@ -269,196 +921,812 @@ class AnsibleLess:
         # every line was flagged as boring, so it's not important
         if self.debug:
             self.print("BORING:")
-            for line in lines:
-                self.print(f"  B: {line.strip()}")
+            for record in records:
+                self.print(f"  B: {record.line.strip()}")
         return False
 
+    def group_section(self, records: list[ClassifiedLine]) -> dict[str, dict]:
+        """Group a section's lines (after its first) by host, noting the host list."""
+        stats = self.stats
+        if stats:
+            start = time.perf_counter()
+        groupings = self.group_by_hosts(
+            islice(records, 1, None), truncate=isinstance(records, SpilledLines)
+        )
+        if stats:
+            stats.add_time("group_by_hosts", start)
+            stats.add_hosts(len(groupings))
+
+        # check if we have seen the list of hosts yet before
+        if len(self.hosts) == 0 and not self.section_flushed:
+            self.hosts = list(groupings.keys())
+
+        return groupings
+
     def print_section(
         self,
-        lines: list[str],
+        lines: list[str | ClassifiedLine],
     ) -> None:
         """Print a section of information after grouping it by hosts and cleaning."""
         # TODO(hardaker): make an CLI option for strip_prefixes
         # TODO(hardaker): make an CLI option for display_by_groups
         # TODO(hardaker): make an CLI option for group_oks
 
+        records = self.classify_lines(lines)
+
         if self.debug:
             self.print("=======================================")
-            self.print("".join(lines))
+            self.print("".join(record.line for record in records))
             self.print("=====----------------------------------")
 
-        if self.strip_prefixes:
-            lines = [re.sub(r"^[^|]*\s*\| ", "", line) for line in lines]
-
         if self.display_by_groups:
-            # print the task itself
-            task_line = lines.pop(0)
-
-            buffer = []
-            groupings = self.group_by_hosts(lines)
+            self.print_groupings(
+                self.display_text(records[0]), self.group_section(records)
+            )
+        elif isinstance(records, SpilledLines):
+            for record in records:
+                self.render("write", self.display_text(record))
+            self.render("write", "\n")
+        else:
+            self.print("".join(self.display_text(record) for record in records))
 
-            # check if we have seen the list of hosts yet before
-            if len(self.hosts) == 0:
-                self.hosts = list(groupings.keys())
+    def print_groupings(self, task_line: str, groupings: dict[str, dict]) -> None:
+        """Print a task's per-host groupings if any host's status is important.
 
-            # sort the hostnames based on text
-            sorted_hosts = sorted(groupings, key=lambda x: groupings[x]["lines"])
-            last_host = None
-            skip_headers = set()
+        groupings maps each host to a dict with its "status" and its
+        output "lines", as built by group_by_hosts() (or by any other
+        source of host results, such as the ansible callback plugin).
+        """
+        buffer = []
+        stats = self.stats
 
-            if self.group_oks:
-                # group 'ok' statuses into a single report line with a count
-                ok_count = len(
-                    [x for x in sorted_hosts if groupings[x]["status"] == "ok"]
-                )
-                if ok_count > 1:
-                    if len(self.hosts) > 0 and ok_count == len(self.hosts):
-                        buffer.append(f"{self.status_prefix} ok: all hosts\n")
-                    elif ok_count > 0:
-                        buffer.append(f"{self.status_prefix} ok: {ok_count} hosts\n")
-                    skip_headers.add("ok")
-
-            if self.group_skipped:
-                # group 'skipped' statuses into a single report line with a count
-                skipped_count = len(
-                    [x for x in sorted_hosts if groupings[x]["status"] == "skipping"]
-                )
-                if skipped_count > 1:
-                    if len(self.hosts) > 0 and skipped_count == len(self.hosts):
-                        buffer.append(f"{self.status_prefix} skipped: all hosts\n")
-                    elif skipped_count > 0:
-                        buffer.append(
-                            f"{self.status_prefix} skipped: {skipped_count} hosts\n"
-                        )
-                    skip_headers.add("skipping")
+        status_ids = self.status_host_ids(groupings)
+        skip_headers = set()
+        # (with some hosts' results dropped, 'all hosts' would be misleading)
+        may_be_all_hosts = not (self.query and self.query.filters_hosts)
 
-            if True:  # bogus just for consistent indentation till refactor
-                # group 'changed' statuses into a single report line with a count
-                changed_count = len(
-                    [x for x in sorted_hosts if groupings[x]["status"] == "changed"]
-                )
-                if changed_count > 1:
-                    if len(self.hosts) > 0 and changed_count == len(self.hosts):
-                        buffer.append(f"{self.status_prefix} changed: all hosts\n")
-                        skip_headers.add("changed")
-
-            if True:  # bogus just for consistent indentation till refactor
-                # group 'failed' statuses into a single report line with a count
-                failed_count = len(
-                    [x for x in sorted_hosts if groupings[x]["status"] == "failed"]
-                )
-                if failed_count > 1:
-                    if len(self.hosts) > 0 and failed_count == len(self.hosts):
-                        buffer.append(f"{self.status_prefix} failed: all hosts\n")
-                        skip_headers.add("failed")
-
-            if True:  # bogus just for consistent indentation till refactor
-                # group 'fatal' statuses into a single report line with a count
-                fatal_count = len(
-                    [x for x in sorted_hosts if groupings[x]["status"] == "fatal"]
-                )
-                if fatal_count > 1:
-                    if len(self.hosts) > 0 and fatal_count == len(self.hosts):
-                        buffer.append(f"{self.status_prefix} fatal: all hosts\n")
-                        skip_headers.add("fatal")
-
-            # if everything was ok or skipped, don't print it at all.
-            if (
-                not self.display_all_sections
-                and fatal_count == 0
-                and failed_count == 0
-                and changed_count == 0
+        for status, label in GROUPED_STATUSES:
+            count = len(status_ids.get(status, []))
+            if count <= 1:
+                continue
+            if (status == "ok" and not self.group_oks) or (
+                status == "skipping" and not self.group_skipped
             ):
-                return
-
-            # actually print the task at this point
+                continue
 
-            # strip off trailing garbage
-            task_line = re.sub(r"\**$", "", task_line.strip())
+            # (hosts only appear once in groupings, so counts can't overshoot)
+            if may_be_all_hosts and count == len(self.hosts) and (
+                self.host_bits(status_ids[status]) == self.all_hosts_bits
+            ):
+                buffer.append((f"{self.status_prefix} {label}: all hosts\n", status))
+                skip_headers.add(status)
+            elif status in ("ok", "skipping"):
+                # group 'ok' and 'skipped' statuses into a report line with a count
+                buffer.append((f"{self.status_prefix} {label}: {count} hosts\n", status))
+                skip_headers.add(status)
+
+        # if everything was ok or skipped, don't print it at all.
+        if not self.display_all_sections and not any(
+            status in status_ids for status in IMPORTANT_STATUSES
+        ):
+            if stats:
+                stats.count("sections_dropped_unchanged")
+            return
+
+        # actually print the task at this point
+
+        # strip off trailing garbage
+        task_line = task_line.strip().rstrip("*").rstrip()
+
+        self.render("heading", task_line)
+
+        shown_hosts = [
+            host
+            for host, grouping in groupings.items()
+            if grouping["status"] not in skip_headers
+        ]
+        if stats:
+            start = time.perf_counter()
+        clusters = self.cluster_hosts(groupings, shown_hosts)
+        if stats:
+            stats.add_time("cluster_hosts", start)
+            stats.count("sections_printed")
+
+        if self.group_similar:
+            for members in cluster_templates(clusters, groupings):
+                self.add_similar_clusters(buffer, groupings, members)
+        else:
+            for cluster in clusters:
+                self.add_cluster(buffer, groupings, cluster)
+        self.render("block", buffer)
 
-            # escape the []s since rich interprets them otherwise
-            # task_line = re.sub("\\]", "\]", task_line)
-            task_line = re.sub("\\[", "\\[", task_line)
+    def add_cluster(
+        self, buffer: list, groupings: dict[str, dict], cluster: list[str]
+    ) -> None:
+        """Add a cluster's host lines and their shared output to a buffer."""
+        for host in cluster:
+            status = groupings[host]["status"]
+            buffer.append((f"{self.status_prefix} {status}: {host}:\n", status))
+        buffer.append(("".join(groupings[cluster[0]]["lines"]), None))
 
-            self.print("==== " + self.escape(task_line))
+    def add_similar_clusters(
+        self,
+        buffer: list,
+        groupings: dict[str, dict],
+        members: list[tuple[list[str], list[str]]],
+    ) -> None:
+        """Add clusters whose outputs share a template to a buffer.
 
-            for host in sorted_hosts:
-                if groupings[host]["status"] in skip_headers:
-                    continue
-                status_line = (
-                    f"{self.status_prefix} {groupings[host]['status']}: {host}:\n"
+        The template is shown once, with placeholders for the values
+        that vary, followed by each cluster's values.
+        """
+        if len(members) == 1:
+            self.add_cluster(buffer, groupings, members[0][0])
+            return
+
+        for (hosts, _values) in members:
+            for host in hosts:
+                status = groupings[host]["status"]
+                buffer.append((f"{self.status_prefix} {status}: {host}:\n", status))
+
+        (text, varying) = fill_template(groupings[members[0][0][0]]["lines"], members)
+        buffer.append((text, None))
+        for (hosts, values) in members:
+            buffer.append(
+                (
+                    f"{self.status_prefix} values for {', '.join(hosts)}:"
+                    f" {', '.join(values[slot] for slot in varying)}\n",
+                    None,
                 )
-                if (
-                    last_host
-                    and groupings[last_host]["lines"] == groupings[host]["lines"]
-                ):
-                    buffer.insert(-1, status_line)
-                    continue
-                buffer.append(status_line)
-                buffer.append("".join(groupings[host]["lines"]))
-                last_host = host
-            self.print("".join(buffer))
-        else:
-            self.print("".join(lines))
+            )
 
     def print_header(self, lines: list[str]) -> None:
         """Print the header lines and calculate full host list."""
         if self.show_header:
-            self.print("".join(lines))
+            self.render("write", "".join(lines))
 
     def print_nothing(self, _lines: list[str]) -> None:
         """Do nothing."""
         return
 
-    def print_task(self, lines: list[str]) -> None:
+    def print_task(self, lines: list[str | ClassifiedLine]) -> None:
         """Print a list of lines for a section."""
         self.print_section(lines)
 
-    def clean_lines(self, lines: list[str]) -> list[str]:
+    def clean_lines(self, lines: list[str | ClassifiedLine]) -> list[str]:
         """Remove boring line prefixes."""
-        lines = [re.sub(r"^[^|]*\s*\| ", "", line.strip()) for line in lines]
-        lines = [re.sub(r"\**$", "", line) for line in lines]
-        lines = self.clean_blanks(lines)
-        return lines
+        return self.clean_blanks([record.clean for record in self.classify_lines(lines)])
+
+    def iter_warnings(self, lines: Iterable[str | ClassifiedLine]) -> Iterator[str]:
+        """Yield the lines of a warning section that aren't boring."""
+        boring_search = self.boring_warning_re.search
+        for warning in self.iter_filtered_lines(lines, cleaned=True):
+            if warning != "" and not boring_search(warning):
+                yield warning
 
-    def print_warning(self, lines: list[str]) -> None:
+    def print_warning(self, lines: Iterable[str | ClassifiedLine]) -> None:
         """prints warnings"""
-        for warning in self.filter_lines(self.clean_lines(lines)):
-            if warning == "":
-                continue
-            for word in self.boring_line_pieces:
-                if word == "[WARNING]:":
-                    continue
-                if word in warning:
-                    break
-            else:
-                self.print(warning)
+        for warning in self.iter_warnings(lines):
+            self.print(warning)
 
         self.print("")  # force blank line
 
 
-    def maybe_print_task(self, lines: list[str]) -> None:
+    def maybe_print_task(self, lines: list[str | ClassifiedLine]) -> None:
         """Print a task if it's important."""
-        if self.check_important(lines):
-            self.print_task(lines)
+        stats = self.stats
+        if self.query and not self.query.section_may_match(lines):
+            if stats:
+                stats.count("sections_dropped_query")
+            return
+
+        if stats:
+            start = time.perf_counter()
+        records = self.classify_lines(lines)
+        if stats:
+            stats.add_time("classify", start)
+            start = time.perf_counter()
+        important = self.check_important(records)
+        if stats:
+            stats.add_time("check_important", start)
+            if not important:
+                stats.count("sections_dropped_boring")
+
+        if important:
+            self.print_task(records)
 
     def print_trailer(self, lines: list[str]) -> None:
         """Print the final section."""
+        if self.timings:
+            self.timings.add_section(self.last_section, self.iter_classified(lines))
         if self.show_trailer:
-            self.pretty_print("".join(lines))
+            self.render("write", "".join(lines))
+
+    def process_line(self, line: str) -> None:
+        """Add a line to the current section, printing the last one when a new one starts."""
+        for section_word in section_words(line):
+            self.dispatch_section(self.last_section, self.current_lines)
+            self.current_lines = []
+            self.last_section = section_word
+            self.section_flushed = False
+
+        self.current_lines.append(line)
+
+    def dispatch_section(self, section_word: str, lines: list[str]) -> None:
+        """Hand a complete section to its printer."""
+        if self.stats:
+            self.stats.add_section(section_word, lines)
+        if self.timings:
+            # (classified here once, for both the timings and the printer)
+            lines = self.classify_lines(lines)
+            self.timings.add_section(section_word, lines)
+        self.printers[section_word](lines)
+
+    def iter_sections(self, input_file) -> Iterator[tuple[str, list[str]]]:
+        """Split input lines into (section word, lines) pairs.
+
+        The final section is left in `current_lines` since it is the trailer.
+        Compressed input is decompressed as it is read, and sections bigger
+        than `section_memory` are spilled to a temporary file.
+        """
+        self.last_section: str = "HEADER"
+        self.current_lines: list[str] = []
+        section_memory = self.section_memory
+        size = 0
+
+        for line in open_log(input_file):
+            for section_word in section_words(line):
+                yield (self.last_section, self.current_lines)
+                self.current_lines = []
+                size = 0
+                self.last_section = section_word
+
+            self.current_lines.append(line)
+            size += len(line)
+            if size > section_memory and type(self.current_lines) is list:
+                self.current_lines = SpilledLines(self.current_lines)
+
+    def print_timings(self) -> None:
+        """Print the slowest tasks, roles and hosts seen so far."""
+        for heading, lines in self.timings.format_report():
+            self.render("heading", heading)
+            self.render("block", [("".join(lines), None)])
+
+    def flush_output(self) -> None:
+        """Push anything printed so far out to the output."""
+        self.renderer.flush()
+
+    def flush_section(self) -> None:
+        """Print the in-progress section up to its last complete host result."""
+        if self.last_section not in ["TASK", "HANDLER", "[WARNING]:"]:
+            return
+
+        if self.last_section == "[WARNING]:":
+            self.dispatch_section(self.last_section, self.current_lines)
+            self.current_lines = []
+            return
+
+        # host output precedes its status line, so only lines through the
+        # last status line (and any '...ignoring' after it) are complete.
+        records = self.classify_lines(self.current_lines)
+        split_at = 0
+        for n, record in enumerate(records):
+            if record.kind == KIND_STATUS or (
+                record.kind == KIND_IGNORING and split_at == n
+            ):
+                split_at = n + 1
+
+        if split_at <= 1:
+            return
+
+        # (parts of a section don't hold every host, so can't define the list)
+        self.section_flushed = True
+        self.dispatch_section(self.last_section, records[:split_at])
+
+        # keep the task line so the rest of the section still prints under it
+        self.current_lines = [self.current_lines[0], *self.current_lines[split_at:]]
 
     def process(self, input_file) -> None:
         """Read a stream of input lines, process them and print results."""
+        stats = self.stats
+        if stats:
+            start = time.perf_counter()
+            input_file = stats.timed_lines(open_log(input_file))
+
+        for (section_word, lines) in self.iter_sections(input_file):
+            self.dispatch_section(section_word, lines)
+
+        self.print_trailer(self.current_lines)
+
+        if stats:
+            stats.add_time("total", start)
+
+    def process_parallel(
+        self, input_file, jobs: int, chunk_lines: int = 20000
+    ) -> None:
+        """Process sections across a pool of worker processes, printing in order.
+
+        The host list used for "all hosts" reports comes from the first
+        printed section, exactly as in process().  Sections are handled
+        here until it is known, and the remaining ones are then rendered by
+        workers that are all given that same host list.
+        """
+        sections = self.iter_sections(input_file)
+        for (section_word, lines) in sections:
+            self.dispatch_section(section_word, lines)
+            if self.hosts:
+                break
+
+        # (imported here since multiprocessing is slow to import)
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            jobs,
+            initializer=_init_section_worker,
+            initargs=(self.worker_config(), self.hosts, self.debug),
+        ) as pool:
+            pending = deque()
+            for chunk in iter_section_chunks(sections, chunk_lines):
+                if isinstance(chunk[0][1], SpilledLines):
+                    # oversized sections are handled here rather than copied
+                    while pending:
+                        self.print_captured(pending.popleft().result())
+                    self.dispatch_section(*chunk[0])
+                    continue
+                pending.append(pool.submit(_render_sections, chunk))
+                # bound how far reading can get ahead of printing
+                while len(pending) > jobs * 2:
+                    self.print_captured(pending.popleft().result())
+            while pending:
+                self.print_captured(pending.popleft().result())
+
+        self.print_trailer(self.current_lines)
+
+    def summarize_log(self, input_file) -> dict:
+        """Group the hosts of every task in a log, without printing anything.
+
+        Returns the log's "header", "trailer" and "hosts" along with its
+        "tasks", each holding a `key` of its name and how many earlier
+        tasks had that name, its `task_line`, host `groupings` and the
+        `warnings` that followed it.  Warnings before the first task are
+        in "warnings".
+        """
+        summary = {"header": [], "tasks": [], "warnings": []}
+        occurrences: dict[str, int] = {}
+
+        for (section_word, lines) in self.iter_sections(input_file):
+            if section_word == "HEADER":
+                summary["header"] = lines
+            elif section_word == "[WARNING]:":
+                tasks = summary["tasks"]
+                warnings = tasks[-1]["warnings"] if tasks else summary["warnings"]
+                warnings.extend(self.iter_warnings(lines))
+            elif section_word in ["TASK", "HANDLER"]:
+                if self.query and not self.query.task_matches(lines[0]):
+                    continue
+                records = self.classify_lines(lines)
+                name = records[0].clean.rstrip()
+                occurrence = occurrences.get(name, 0)
+                occurrences[name] = occurrence + 1
+                summary["tasks"].append(
+                    {
+                        "key": (name, occurrence),
+                        "task_line": self.display_text(records[0]),
+                        "groupings": self.group_section(records),
+                        "warnings": [],
+                    }
+                )
+
+        summary["trailer"] = self.current_lines
+        summary["hosts"] = self.hosts
+        return summary
+
+    def setting(self, section: str, name: str):
+        """Return a configuration setting, or its default if it isn't configured.
+
+        Configurations made before a setting existed keep working this way.
+        """
+        return self.config.get(section, {}).get(name, default_config[section][name])
+
+    def worker_config(self) -> dict:
+        """Return the configuration sections that AnsibleLess reads.
+
+        Only these are sent to worker processes, since others (such as the
+        command line's output and debug sections) may hold open files,
+        which can't be pickled.
+        """
+        return {
+            section: self.config[section]
+            for section in default_config
+            if section in self.config
+        }
+
+    def process_logs(self, input_files: list[str], jobs: int = 1) -> None:
+        """Read many logs concurrently and print one summary across them all.
+
+        Tasks with the same name (and occurrence of that name) are merged,
+        so each task's clusters show the hosts from every log.  Tasks that
+        only appear in some logs are placed after the task preceding them.
+        The logs are read by a thread pool, or by `jobs` worker processes.
+        """
+        # (imported here since multiprocessing is slow to import)
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+        if jobs > 1:
+            executor = ProcessPoolExecutor(jobs)
+        else:
+            executor = ThreadPoolExecutor(min(len(input_files), 8) or 1)
+        with executor:
+            summaries = executor.map(
+                _summarize_log_file,
+                [
+                    (self.worker_config(), self.debug, input_file)
+                    for input_file in input_files
+                ],
+            )
+
+            merged: dict[tuple[str, int], dict] = {}
+            # the keys of tasks (None for the start) to the keys that follow them
+            following: dict[tuple[str, int] | None, list[tuple[str, int]]] = {}
+            leading_warnings: list[str] = []
+            hosts: dict[str, None] = {}
+            trailers: list[str] = []
+
+            for summary in summaries:
+                previous = None
+                add_new_items(leading_warnings, summary["warnings"])
+                for task in summary["tasks"]:
+                    key = task["key"]
+                    entry = merged.get(key)
+                    if entry is None:
+                        entry = merged[key] = {
+                            "task_line": task["task_line"],
+                            "groupings": {},
+                            "warnings": [],
+                        }
+                        # place new tasks just after the task before them
+                        following.setdefault(previous, []).insert(0, key)
+                    merge_groupings(entry["groupings"], task["groupings"])
+                    add_new_items(entry["warnings"], task["warnings"])
+                    previous = key
+                hosts.update(dict.fromkeys(summary["hosts"]))
+                trailers.extend(summary["trailer"])
+
+        self.hosts = list(hosts)
+        if leading_warnings:
+            self.print_warning(leading_warnings)
+
+        to_visit = list(reversed(following.get(None, [])))
+        while to_visit:
+            key = to_visit.pop()
+            entry = merged[key]
+            self.print_groupings(entry["task_line"], entry["groupings"])
+            if entry["warnings"]:
+                self.print_warning(entry["warnings"])
+            to_visit.extend(reversed(following.get(key, [])))
+
+        self.print_trailer(trailers)
+
+    def print_captured(self, calls: list[tuple[str, object]]) -> None:
+        """Replay the rendering calls recorded by a CapturedRenderer."""
+        for (method, data) in calls:
+            self.render(method, data)
+
+    def may_print_section_bytes(self, data: bytes | mmap.mmap, start: int, end: int) -> bool:
+        """Cheaply decide from raw bytes whether the current section could print."""
+        if self.last_section not in ["TASK", "HANDLER"]:
+            return True
+
+        # (maybe_print_task makes the same checks on the decoded lines)
+        query = self.query
+        if query and not (
+            query.task_matches(self.current_lines[0])
+            and query.bytes_may_match(data, start, end)
+        ):
+            return False
+
+        # the first printed section defines the host list, so decode until then
+        if self.display_all_sections or not self.display_by_groups or not self.hosts:
+            return True
+
+        return any(
+            data.find(needle, start, end) != -1 for needle in IMPORTANT_STATUS_BYTES
+        )
+
+    def process_mmap(self, input_file) -> None:
+        """Process a log file via mmap, decoding only sections that may print.
+
+        Section boundaries are found with bytes searches, and TASK/HANDLER
+        sections without any changed/failed/fatal hosts are never decoded.
+        Input that can't be mapped (pipes, empty or compressed files) falls
+        back to process().
+        """
+        try:
+            data = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, io.UnsupportedOperation):
+            self.process(input_file)
+            return
+
+        if detect_compression(data[:6]):
+            data.close()
+            self.process(input_file)
+            return
+
+        stats = self.stats
+        if stats:
+            start = time.perf_counter()
+
         self.last_section: str = "HEADER"
         self.current_lines: list[str] = []
 
-        for line in input_file:
-            for section_word in ["TASK", "HANDLER", "PLAY RECAP", "[WARNING]:"]:
-                if line.startswith(section_word) or f" {section_word} " in line:
-                    self.printers[self.last_section](self.current_lines)
-                    self.current_lines = []
-                    self.last_section = section_word
+        with data:
+            position = 0
+            for offset in [*iter_section_offsets(data), len(data)]:
+                # the lines between the previous section's first line and here
+                if offset > position and (
+                    offset == len(data)
+                    or self.may_print_section_bytes(data, position, offset)
+                ):
+                    if offset - position > self.section_memory:
+                        self.current_lines = SpilledLines(self.current_lines)
+                        self.current_lines.extend(
+                            iter_decoded_lines(data, position, offset)
+                        )
+                    else:
+                        self.current_lines.extend(decode_lines(data[position:offset]))
 
-            self.current_lines.append(line)
+                if offset == len(data):
+                    break
+
+                line_end = data.find(b"\n", offset)
+                position = len(data) if line_end == -1 else line_end + 1
+                for line in decode_lines(data[offset:position]):
+                    self.process_line(line)
+
+        self.print_trailer(self.current_lines)
+
+        if stats:
+            stats.add_time("total", start)
+
+    def process_last_runs(self, input_file, runs: int) -> None:
+        """Process only the last `runs` playbook runs of a log file.
+
+        The runs are found by searching backward from the end of the
+        mapped file, so only they are read.  Input that can't be mapped
+        (pipes, empty or compressed files) is processed in full.
+        """
+        try:
+            data = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, io.UnsupportedOperation):
+            self.process(input_file)
+            return
+
+        with data:
+            if detect_compression(data[:6]):
+                self.process(input_file)
+                return
+
+            start = find_last_runs(data, runs)
+            if self.stats:
+                self.stats.count("bytes_skipped", start)
+            self.process(iter_decoded_lines(data, start, len(data)))
+
+    def may_print_indexed_section(
+        self, section: dict, index: SectionIndex | None = None
+    ) -> bool:
+        """Decide from its index entry whether a section could print."""
+        if section["section"] == "HEADER":
+            return self.show_header
+
+        if section["section"] not in ["TASK", "HANDLER"]:
+            return True
+
+        query = self.query
+        if query and not query.task_matches(section["name"]):
+            return False
+
+        if self.display_all_sections:
+            return True
+
+        # (the index lists the hosts with changed, failed or fatal statuses)
+        if query and index and not query.hosts_may_match(index.section_hosts(section)):
+            return False
+
+        if not section["important"]:
+            return False
+
+        return not self.display_by_groups or any(
+            section["counts"].get(status) for status in IMPORTANT_STATUSES
+        )
+
+    def process_indexed(
+        self, input_file, index: SectionIndex, sections: list[dict] | None = None
+    ) -> None:
+        """Print sections of a log file using a SectionIndex built for it.
+
+        Sections the index shows can't print are never read.  `sections`
+        may be a subset of the index's sections, such as from its select().
+        """
+        if sections is None:
+            sections = index.sections
+        trailer = index.sections[-1] if index.sections else None
+
+        if not self.hosts:
+            self.hosts = index.all_hosts
+
+        try:
+            data = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, io.UnsupportedOperation):
+            data = b""
+
+        for section in sections:
+            if section is trailer:
+                if self.show_trailer:
+                    self.print_trailer(self.read_indexed_section(data, section))
+                continue
+
+            if self.may_print_indexed_section(section, index):
+                self.dispatch_section(
+                    section["section"], self.read_indexed_section(data, section)
+                )
+
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+    def read_indexed_section(self, data: bytes | mmap.mmap, section: dict) -> list[str]:
+        """Decode the lines of an indexed section, spilling it if it's too big."""
+        (start, end) = (section["offset"], section["offset"] + section["length"])
+        if end - start > self.section_memory:
+            return SpilledLines(iter_decoded_lines(data, start, end))
+        return decode_lines(data[start:end])
+
+    def process_incremental(self, input_file, checkpoint_path: str | os.PathLike) -> None:
+        """Process only what was appended to a log file since the last checkpoint.
+
+        The parser state (byte offset, pending section lines, last section
+        and known hosts) is saved to `checkpoint_path` after each run and
+        restored at the start of the next.  A trailing incomplete line is
+        left for the next run.
+        """
+        log_path = getattr(input_file, "name", input_file)
+        if not isinstance(log_path, (str, os.PathLike)) or not os.path.isfile(log_path):
+            msg = f"only log files can be checkpointed, not {log_path!r}"
+            raise ValueError(msg)
+
+        with open(log_path, "rb") as log_file:
+            compression = detect_compression(log_file.read(6))
+        if compression:
+            # (offsets in the decompressed stream can't be resumed from)
+            warning(f"{log_path} is compressed, so it's processed without a checkpoint")
+            self.process(log_path)
+            return
+
+        state = load_checkpoint(checkpoint_path, log_path)
+        if state:
+            offset = state["offset"]
+            self.last_section = state["last_section"]
+            self.current_lines = state["current_lines"]
+            self.hosts = state["hosts"]
+        else:
+            offset = 0
+            self.last_section: str = "HEADER"
+            self.current_lines: list[str] = []
+
+        with open(log_path, "rb") as log_file:
+            log_file.seek(offset)
+            for raw_line in log_file:
+                if not raw_line.endswith(b"\n"):
+                    break
+
+                offset += len(raw_line)
+                line = raw_line.decode("utf-8", errors="replace")
+                if line.endswith("\r\n"):
+                    line = line[:-2] + "\n"
+                self.process_line(line)
+
+        save_checkpoint(
+            checkpoint_path,
+            log_path,
+            {
+                "offset": offset,
+                "last_section": self.last_section,
+                "current_lines": self.current_lines,
+                "hosts": self.hosts,
+            },
+        )
+
+        self.print_trailer(self.current_lines)
+
+    def follow(
+        self,
+        input_file,
+        idle_timeout: float = 2.0,
+        poll_interval: float = 0.1,
+    ) -> None:
+        """Process a growing log file or pipe, printing sections as they complete.
+
+        An in-progress section is printed once no new lines have arrived
+        for `idle_timeout` seconds.
+        """
+        self.last_section: str = "HEADER"
+        self.current_lines: list[str] = []
+        self.section_flushed = False
+
+        last_line_time = time.monotonic()
+        idle_flushed = True
+
+        for line in follow_lines(input_file, poll_interval):
+            if line is None:
+                if (
+                    not idle_flushed
+                    and time.monotonic() - last_line_time >= idle_timeout
+                ):
+                    self.flush_section()
+                    self.flush_output()
+                    idle_flushed = True
+                continue
+
+            last_line_time = time.monotonic()
+            idle_flushed = False
+
+            self.process_line(line)
+            if len(self.current_lines) == 1:
+                # a new section just started, so the previous one was printed
+                self.flush_output()
 
         self.print_trailer(self.current_lines)
+        self.flush_output()
+
+
+def iter_section_chunks(
+    sections: Iterable[tuple[str, list[str]]], chunk_lines: int
+) -> Iterator[list[tuple[str, list[str]]]]:
+    """Batch sections into chunks of roughly chunk_lines lines.
+
+    Spilled sections are always in chunks of their own.
+    """
+    chunk = []
+    size = 0
+    for section in sections:
+        if isinstance(section[1], SpilledLines):
+            if chunk:
+                yield chunk
+                chunk = []
+                size = 0
+            yield [section]
+            continue
+        chunk.append(section)
+        size += len(section[1])
+        if size >= chunk_lines:
+            yield chunk
+            chunk = []
+            size = 0
+    if chunk:
+        yield chunk
+
+
+_worker_ansible_less: AnsibleLess | None = None
+
+
+def _init_section_worker(config: dict, hosts: list[str], debug: bool) -> None:
+    """Create the AnsibleLess instance used by a process_parallel worker."""
+    global _worker_ansible_less
+    _worker_ansible_less = AnsibleLess(config=config, debug=debug)
+    _worker_ansible_less.renderer = CapturedRenderer()
+    _worker_ansible_less.hosts = hosts
+
+
+def _render_sections(
+    sections: list[tuple[str, list[str]]]
+) -> list[tuple[str, object]]:
+    """Render a chunk of sections in a worker, returning its rendering calls."""
+    for (section_word, lines) in sections:
+        _worker_ansible_less.printers[section_word](lines)
+    return _worker_ansible_less.renderer.take()
+
+
+def _summarize_log_file(arguments: tuple[dict, bool, str]) -> dict:
+    """Summarize one log file for process_logs, in a thread or process."""
+    (config, debug, input_file) = arguments
+    with open(input_file, "rb") as log_file:
+        return AnsibleLess(config=config, debug=debug).summarize_log(log_file)
@@ -0,0 +1,173 @@
+"""Synthetic ansible log generation and parsing pipeline benchmarks."""
+
+from __future__ import annotations
+from collections.abc import Callable
+import io
+import platform
+import random
+import time
+import tracemalloc
+
+from ansible_less import AnsibleLess, __VERSION__
+
+LOG_PREFIX = "2025-12-17 15:41:09,848 p=1298946 u=hardaker n=ansible | "
+
+default_status_mix = {"ok": 0.7, "skipping": 0.15, "changed": 0.12, "failed": 0.03}
+
+
+def generate_log(
+    host_count: int = 100,
+    task_count: int = 200,
+    status_mix: dict[str, float] = default_status_mix,
+    diff_lines: int = 10,
+    warning_rate: float = 0.02,
+    prefixed: bool = True,
+    seed: int = 0,
+) -> list[str]:
+    """Generate the lines of a realistic looking ansible-playbook log.
+
+    - `status_mix` maps host statuses to their relative frequency.
+    - Changed hosts print a `--diff` style diff of `diff_lines` lines.
+    - `warning_rate` is the chance of a [WARNING]: after each task.
+    - `prefixed` adds the `date pid user |` prefix that log_path adds.
+    """
+    randomizer = random.Random(seed)
+    hosts = [f"host{number}.example.com" for number in range(host_count)]
+    statuses = list(status_mix.keys())
+    weights = list(status_mix.values())
+    prefix = LOG_PREFIX if prefixed else ""
+
+    lines = [f"PLAY [all] {'*' * 60}\n"]
+    for task in range(task_count):
+        lines.append(f"TASK [role{task % 10} : task number {task}] {'*' * 40}\n")
+        lines.append(
+            "Wednesday 17 December 2025  15:52:02 +0000 (0:00:04.372)"
+            "       0:11:12.388 ****\n"
+        )
+        for host in hosts:
+            status = randomizer.choices(statuses, weights)[0]
+            if status == "changed":
+                lines.append(f"--- before: /etc/app/task{task}.conf\n")
+                lines.append(
+                    "+++ after: /home/user/.ansible/tmp/"
+                    f"ansible-local-{randomizer.randrange(10**8)}/tmpabc/task{task}.conf\n"
+                )
+                lines.append(f"@@ -1,{diff_lines} +1,{diff_lines} @@\n")
+                lines.extend(
+                    f"+setting{line} = value{task}\n" for line in range(diff_lines)
+                )
+                lines.append(f"changed: [{host}]\n")
+            elif status == "failed":
+                lines.append(
+                    f'fatal: [{host}]: FAILED! => {{"changed": false, "msg": "task {task} failed"}}\n'
+                )
+            else:
+                lines.append(f"{status}: [{host}]\n")
+        if randomizer.random() < warning_rate:
+            lines.append(f"[WARNING]: something unusual happened in task {task}\n")
+
+    lines.append(f"PLAY RECAP {'*' * 60}\n")
+    for host in hosts:
+        lines.append(f"{host} : ok={task_count} changed=1 failed=0\n")
+
+    return [prefix + line for line in lines]
+
+
+def time_phase(function: Callable[[], object], repeat: int) -> tuple[float, int]:
+    """Return the best run time of a function and its peak traced memory."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # memory tracing slows things down, so measure it in a separate run
+    tracemalloc.start()
+    try:
+        function()
+        (_, peak_memory) = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return (best, peak_memory)
+
+
+def run_benchmarks(lines: list[str], repeat: int = 3) -> dict[str, dict]:
+    """Time each phase of the parsing pipeline over a list of log lines."""
+    splitter = AnsibleLess(output_to=io.StringIO())
+    task_sections = [
+        section_lines
+        for (section_word, section_lines) in splitter.iter_sections(lines)
+        if section_word in ["TASK", "HANDLER"]
+    ]
+    task_line_count = sum(len(section_lines) for section_lines in task_sections)
+
+    # the host list normally comes from the first printed section
+    hosts = []
+    if task_sections:
+        hosts = list(splitter.group_by_hosts(task_sections[0][1:]))
+
+    def new_ansible_less() -> AnsibleLess:
+        ansible_less = AnsibleLess(output_to=io.StringIO())
+        ansible_less.hosts = list(hosts)
+        return ansible_less
+
+    def run_process() -> None:
+        AnsibleLess(output_to=io.StringIO()).process(lines)
+
+    def run_group_by_hosts() -> None:
+        ansible_less = new_ansible_less()
+        for section_lines in task_sections:
+            ansible_less.group_by_hosts(section_lines[1:])
+
+    def run_filter_lines() -> None:
+        ansible_less = new_ansible_less()
+        for section_lines in task_sections:
+            ansible_less.filter_lines(section_lines)
+
+    def run_print_section() -> None:
+        ansible_less = new_ansible_less()
+        for section_lines in task_sections:
+            ansible_less.print_section(section_lines)
+
+    phases = {
+        "process": (run_process, len(lines), len(task_sections)),
+        "group_by_hosts": (run_group_by_hosts, task_line_count, len(task_sections)),
+        "filter_lines": (run_filter_lines, task_line_count, len(task_sections)),
+        "print_section": (run_print_section, task_line_count, len(task_sections)),
+    }
+
+    results = {}
+    for name, (function, line_count, section_count) in phases.items():
+        (seconds, peak_memory) = time_phase(function, repeat)
+        results[name] = {
+            "seconds": seconds,
+            "lines": line_count,
+            "sections": section_count,
+            "lines_per_second": line_count / seconds if seconds else None,
+            "sections_per_second": section_count / seconds if seconds else None,
+            "peak_memory_bytes": peak_memory,
+        }
+    return results
+
+
+def benchmark_report(parameters: dict, results: dict[str, dict]) -> dict:
+    """Bundle benchmark results with what's needed to compare them later."""
+    return {
+        "version": __VERSION__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": parameters,
+        "results": results,
+    }
+
+
+def compare_reports(old: dict, new: dict) -> dict[str, float]:
+    """Return the lines/sec speedup of each phase in new relative to old."""
+    speedups = {}
+    for name, result in new["results"].items():
+        old_result = old["results"].get(name)
+        if old_result and old_result["lines_per_second"] and result["lines_per_second"]:
+            speedups[name] = result["lines_per_second"] / old_result["lines_per_second"]
+    return speedups
@@ -0,0 +1,163 @@
+"""Summarizing structured ansible task results without parsing log text."""
+
+from __future__ import annotations
+import difflib
+
+from ansible_less import AnsibleLess, merge_status
+
+
+def diff_lines(diff: dict) -> list[str]:
+    """Return the lines of an ansible result's diff, like ansible displays them."""
+    if "prepared" in diff:
+        return diff["prepared"].splitlines(keepends=True)
+
+    if "before" not in diff and "after" not in diff:
+        return []
+
+    before = diff.get("before") or ""
+    after = diff.get("after") or ""
+    if not isinstance(before, str) or not isinstance(after, str):
+        # non-text diffs (such as dicts) have no useful line form
+        return []
+
+    return [
+        line if line.endswith("\n") else line + "\n"
+        for line in difflib.unified_diff(
+            before.splitlines(keepends=True),
+            after.splitlines(keepends=True),
+            fromfile="before: " + (diff.get("before_header") or ""),
+            tofile="after: " + (diff.get("after_header") or ""),
+        )
+    ]
+
+
+def result_lines(status: str, result: dict) -> list[str]:
+    """Return the output lines worth showing for a host's task result."""
+    lines = []
+
+    # loops report each item's result in 'results'
+    for item_result in [result, *result.get("results", [])]:
+        if not isinstance(item_result, dict):
+            continue
+        diffs = item_result.get("diff") or []
+        if isinstance(diffs, dict):
+            diffs = [diffs]
+        for diff in diffs:
+            lines.extend(diff_lines(diff))
+
+    if status in ("failed", "fatal"):
+        if result.get("msg"):
+            lines.append(f"{result['msg']}\n")
+        for key in ("stderr_lines", "stdout_lines"):
+            lines.extend(f"{line}\n" for line in result.get(key, []))
+
+    return lines
+
+
+class ResultSummarizer:
+    """Groups task result events by host and prints them with AnsibleLess.
+
+    Events are dicts whose "event" names the ansible callback that
+    produced them (without the "v2_" prefix):
+
+    - playbook_on_play_start: a play's "name" and its "hosts"
+    - playbook_on_task_start: a task's "name", and "handler" if it's one
+    - runner_on_ok, runner_on_failed, runner_on_skipped and
+      runner_on_unreachable: a "host" and its "result" dict
+    - playbook_on_stats: the end of the run
+
+    Each task is summarized when the next one starts, using the same
+    grouping, clustering and boring section dropping as the log parser.
+    """
+
+    def __init__(self, ansible_less: AnsibleLess | None = None):
+        """Create a ResultSummarizer."""
+        self.ansible_less = ansible_less or AnsibleLess()
+        self.task_line: str | None = None
+        self.groupings: dict[str, dict] = {}
+        self.warnings: list[str] = []
+
+    def handle(self, event: dict) -> None:
+        """Handle a single task event."""
+        handler = getattr(self, "on_" + event["event"], None)
+        if handler:
+            handler(event)
+
+    def handle_all(self, events: list[dict]) -> None:
+        """Handle a list of (perhaps recorded) task events."""
+        for event in events:
+            self.handle(event)
+
+    def add_result(self, host: str, status: str, result: dict) -> None:
+        """Add a host's result to the current task's groupings."""
+        normalize_line = self.ansible_less.normalize_line
+        lines = [normalize_line(line) for line in result_lines(status, result)]
+
+        if host not in self.groupings:
+            self.groupings[host] = {"status": status, "lines": lines}
+        else:
+            self.groupings[host]["lines"].extend(lines)
+            self.groupings[host]["status"] = merge_status(
+                self.groupings[host]["status"], status
+            )
+
+        self.warnings.extend(result.get("warnings", []))
+        self.warnings.extend(
+            deprecation["msg"]
+            for deprecation in result.get("deprecations", [])
+            if "msg" in deprecation
+        )
+
+    def finish_task(self) -> None:
+        """Print the summary of the current task, if there is one."""
+        if self.task_line is None:
+            return
+
+        ansible_less = self.ansible_less
+        if len(ansible_less.hosts) == 0:
+            ansible_less.hosts = list(self.groupings)
+
+        if self.groupings:
+            ansible_less.print_groupings(self.task_line, self.groupings)
+        if self.warnings:
+            ansible_less.print_warning(
+                [f"[WARNING]: {warning}\n" for warning in self.warnings]
+            )
+
+        self.task_line = None
+        self.groupings = {}
+        self.warnings = []
+
+    def on_playbook_on_play_start(self, event: dict) -> None:
+        """Note the hosts of a new play."""
+        self.finish_task()
+        if event.get("hosts"):
+            self.ansible_less.hosts = list(event["hosts"])
+
+    def on_playbook_on_task_start(self, event: dict) -> None:
+        """Start collecting results for a new task."""
+        self.finish_task()
+        section = "RUNNING HANDLER" if event.get("handler") else "TASK"
+        self.task_line = f"{section} [{event['name']}]"
+
+    def on_runner_on_ok(self, event: dict) -> None:
+        """Add a successful result."""
+        result = event.get("result", {})
+        status = "changed" if result.get("changed") else "ok"
+        self.add_result(event["host"], status, result)
+
+    def on_runner_on_failed(self, event: dict) -> None:
+        """Add a failed result."""
+        self.add_result(event["host"], "fatal", event.get("result", {}))
+
+    def on_runner_on_unreachable(self, event: dict) -> None:
+        """Add an unreachable host's result."""
+        self.add_result(event["host"], "fatal", event.get("result", {}))
+
+    def on_runner_on_skipped(self, event: dict) -> None:
+        """Add a skipped result."""
+        self.add_result(event["host"], "skipping", event.get("result", {}))
+
+    def on_playbook_on_stats(self, _event: dict) -> None:
+        """Print the last task at the end of the run."""
+        self.finish_task()
@@ -0,0 +1,63 @@
+"""Saved parser state for incrementally processing appended log files."""
+
+from __future__ import annotations
+from logging import warning
+from pathlib import Path
+import hashlib
+import json
+import os
+
+CHECKPOINT_VERSION = 1
+
+HEAD_DIGEST_SIZE = 65536
+
+
+def head_digest(log_path: str | os.PathLike, length: int) -> str:
+    """Return a digest of the first bytes of a file."""
+    with open(log_path, "rb") as log_file:
+        head = log_file.read(min(length, HEAD_DIGEST_SIZE))
+    return hashlib.blake2b(head, digest_size=16).hexdigest()
+
+
+def load_checkpoint(
+    checkpoint_path: str | os.PathLike, log_path: str | os.PathLike
+) -> dict | None:
+    """Load a checkpoint, if there is one that still fits the log file.
+
+    A log that shrank or whose beginning changed (such as after log
+    rotation) can't be resumed, so None is returned for it.
+    """
+    if not Path(checkpoint_path).exists():
+        return None
+
+    with open(checkpoint_path) as checkpoint_file:
+        state = json.load(checkpoint_file)
+
+    if state.get("version") != CHECKPOINT_VERSION:
+        warning(f"ignoring checkpoint {checkpoint_path} with an unknown version")
+        return None
+
+    if os.path.getsize(log_path) < state["offset"] or head_digest(
+        log_path, state["offset"]
+    ) != state["head_digest"]:
+        warning(f"{log_path} changed since checkpoint {checkpoint_path}; starting over")
+        return None
+
+    return state
+
+
+def save_checkpoint(
+    checkpoint_path: str | os.PathLike, log_path: str | os.PathLike, state: dict
+) -> None:
+    """Save parser state (offset, last_section, current_lines, hosts) for later."""
+    state = {
+        "version": CHECKPOINT_VERSION,
+        "head_digest": head_digest(log_path, state["offset"]),
+        **state,
+    }
+
+    # write then rename, so an interrupted save never leaves a broken checkpoint
+    temporary_path = f"{checkpoint_path}.tmp"
+    with open(temporary_path, "w") as checkpoint_file:
+        json.dump(state, checkpoint_file)
+    os.replace(temporary_path, checkpoint_path)
@@ -0,0 +1,158 @@
+"""Comparing the task outcomes of two ansible runs."""
+
+from __future__ import annotations
+from typing import Iterator
+
+from ansible_less import AnsibleLess, lines_digest
+
+
+def fingerprint_groupings(groupings: dict[str, dict]) -> dict[str, tuple[str, bytes]]:
+    """Reduce a task's host groupings to each host's status and output digest."""
+    return {
+        host: (grouping["status"], lines_digest(grouping["lines"]))
+        for host, grouping in groupings.items()
+    }
+
+
+def iter_log_sections(
+    ansible_less: AnsibleLess, input_file
+) -> Iterator[tuple[str, list[str]]]:
+    """Yield the sections of a log, including the last one.
+
+    iter_sections() leaves the last section for the trailer, but a log
+    cut short (such as by an aborted run) ends with a task instead.
+    """
+    yield from ansible_less.iter_sections(input_file)
+    yield (ansible_less.last_section, ansible_less.current_lines)
+
+
+def iter_log_tasks(
+    ansible_less: AnsibleLess, input_file
+) -> Iterator[tuple[tuple[str, int], str, dict[str, dict]]]:
+    """Yield the key, task line and host groupings of each task in a log.
+
+    Only one section is held at a time, so logs of any size can be read.
+    """
+    query = ansible_less.query
+    occurrences: dict[str, int] = {}
+
+    for (section_word, lines) in iter_log_sections(ansible_less, input_file):
+        if section_word not in ["TASK", "HANDLER"]:
+            continue
+        if query and not query.task_matches(lines[0]):
+            continue
+
+        records = ansible_less.classify_lines(lines)
+        name = records[0].clean.rstrip()
+        occurrence = occurrences.get(name, 0)
+        occurrences[name] = occurrence + 1
+        yield (
+            (name, occurrence),
+            ansible_less.display_text(records[0]),
+            ansible_less.group_section(records),
+        )
+
+
+def fingerprint_log(
+    ansible_less: AnsibleLess, input_file
+) -> dict[tuple[str, int], dict]:
+    """Return the task line and host fingerprints of each task in a log."""
+    return {
+        key: {"task_line": task_line, "hosts": fingerprint_groupings(groupings)}
+        for (key, task_line, groupings) in iter_log_tasks(ansible_less, input_file)
+    }
+
+
+class LogComparison:
+    """Prints the tasks whose outcomes differ between an old and a new log.
+
+    The old log is reduced to a table of (status, output digest) pairs
+    per task and host.  The new log is then streamed and each of its
+    tasks is printed only if a host's status or (normalized) output
+    differs from the old run, showing just the hosts that differ.
+    Tasks are matched by name and by how many earlier tasks had the
+    same name.
+    """
+
+    def __init__(self, ansible_less: AnsibleLess | None = None):
+        """Create a LogComparison."""
+        self.ansible_less = ansible_less or AnsibleLess()
+
+    def compare(self, old_file, new_file) -> None:
+        """Print the differences between two logs."""
+        ansible_less = self.ansible_less
+        stats = ansible_less.stats
+        old_tasks = fingerprint_log(ansible_less, old_file)
+
+        for (key, task_line, groupings) in iter_log_tasks(ansible_less, new_file):
+            if stats:
+                stats.count("tasks_compared")
+            old_task = old_tasks.pop(key, None)
+            if old_task is None:
+                self.print_changes(task_line, {}, groupings, only_in="new")
+            else:
+                self.print_changes(task_line, old_task["hosts"], groupings)
+
+        # tasks only the old log ran
+        for old_task in old_tasks.values():
+            self.print_changes(
+                old_task["task_line"], old_task["hosts"], {}, only_in="old"
+            )
+
+        ansible_less.flush_output()
+
+    def print_changes(
+        self,
+        task_line: str,
+        old_hosts: dict[str, tuple[str, bytes]],
+        groupings: dict[str, dict],
+        only_in: str | None = None,
+    ) -> None:
+        """Print the hosts of a task whose outcome changed, if any did.
+
+        `only_in` names the log ("old" or "new") if just one ran the task.
+        """
+        ansible_less = self.ansible_less
+        prefix = ansible_less.status_prefix
+        fingerprints = fingerprint_groupings(groupings)
+
+        changed_hosts = [
+            host
+            for host, fingerprint in fingerprints.items()
+            if old_hosts.get(host) != fingerprint
+        ]
+        missing_hosts: dict[str, list[str]] = {}
+        for host, (status, _digest) in old_hosts.items():
+            if host not in fingerprints:
+                missing_hosts.setdefault(status, []).append(host)
+
+        if not changed_hosts and not missing_hosts:
+            return
+
+        task_line = task_line.strip().rstrip("*").rstrip()
+        if only_in:
+            task_line += f" (only in the {only_in} log)"
+        ansible_less.render("heading", task_line)
+
+        buffer = []
+        for cluster in ansible_less.cluster_hosts(groupings, changed_hosts):
+            for host in cluster:
+                status = groupings[host]["status"]
+                old = old_hosts.get(host)
+                if only_in:
+                    change = ""
+                elif old is None:
+                    change = " (new host)"
+                elif old[0] != status:
+                    change = f" (was {old[0]})"
+                else:
+                    change = " (different output)"
+                buffer.append((f"{prefix} {status}: {host}{change}:\n", status))
+            buffer.append(("".join(groupings[cluster[0]]["lines"]), None))
+
+        for status, hosts in missing_hosts.items():
+            buffer.append(
+                (f"{prefix} missing: {', '.join(hosts)} (was {status})\n", status)
+            )
+
+        ansible_less.render("block", buffer)
@@ -0,0 +1,258 @@
+"""Sidecar section indexes for quickly re-rendering large log files."""
+
+from __future__ import annotations
+from logging import warning
+from pathlib import Path
+import hashlib
+import json
+import mmap
+import os
+import re
+
+from ansible_less import (
+    IMPORTANT_STATUSES,
+    KIND_STATUS,
+    AnsibleLess,
+    decode_lines,
+    iter_decoded_lines,
+    iter_section_offsets,
+    merge_status,
+    section_words,
+)
+from ansible_less.readers import detect_compression
+from ansible_less.spill import SpilledLines
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".alidx"
+
+HEAD_DIGEST_SIZE = 65536
+
+
+def file_identity(path: str | os.PathLike) -> dict:
+    """Return what's needed to tell whether a log file has changed."""
+    file_stat = os.stat(path)
+    with open(path, "rb") as log_file:
+        head = log_file.read(HEAD_DIGEST_SIZE)
+    return {
+        "size": file_stat.st_size,
+        "mtime_ns": file_stat.st_mtime_ns,
+        "head_digest": hashlib.blake2b(head, digest_size=16).hexdigest(),
+    }
+
+
+def can_index(path: str | os.PathLike) -> bool:
+    """Decide whether a log file can be indexed (it's not empty or compressed)."""
+    with open(path, "rb") as log_file:
+        head = log_file.read(6)
+    return bool(head) and not detect_compression(head)
+
+
+class SectionIndex:
+    """The byte ranges, names and host statuses of each section in a log.
+
+    Each section entry holds its `offset`, `length`, `section` word, task
+    `name`, whether check_important() found it `important`, the count of
+    hosts per status and the ids of the hosts with interesting statuses.
+    """
+
+    def __init__(
+        self,
+        sections: list[dict],
+        host_names: list[str],
+        hosts: list[int],
+        identity: dict,
+    ):
+        """Create a SectionIndex."""
+        self.sections = sections
+        self.host_names = host_names
+        self.hosts = hosts  # the ids of the 'all hosts' list
+        self.identity = identity
+
+    @classmethod
+    def build(
+        cls, path: str | os.PathLike, section_memory: int | None = None
+    ) -> SectionIndex:
+        """Scan a log file and index each of its sections.
+
+        Sections bigger than `section_memory` (in bytes, by default the
+        AnsibleLess default) are spilled to disk while they're scanned.
+        """
+        if not can_index(path):
+            msg = f"can't index {path}, which is empty or compressed"
+            raise ValueError(msg)
+
+        ansible_less = AnsibleLess()
+        ansible_less.display_all_sections = False
+        if section_memory is None:
+            section_memory = ansible_less.section_memory
+
+        sections = []
+        host_ids: dict[str, int] = {}
+        all_hosts = None
+
+        with open(path, "rb") as log_file:
+            data = mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        with data:
+            offsets = [0, *iter_section_offsets(data), len(data)]
+            section_word = "HEADER"
+            for start, end in zip(offsets, offsets[1:]):
+                if start == end and start != 0:
+                    continue
+
+                if end - start > section_memory:
+                    lines = SpilledLines(iter_decoded_lines(data, start, end))
+                else:
+                    lines = decode_lines(data[start:end])
+                if start != 0 or (lines and section_words(lines[0])):
+                    section_word = (section_words(lines[0]) or [section_word])[-1]
+
+                statuses: dict[str, str] = {}
+                for record in ansible_less.iter_classified(lines):
+                    if record.kind == KIND_STATUS:
+                        host = record.host
+                        if host in statuses:
+                            statuses[host] = merge_status(statuses[host], record.status)
+                        else:
+                            statuses[host] = record.status
+                        if host not in host_ids:
+                            host_ids[host] = len(host_ids)
+
+                important = section_word == "HEADER" or ansible_less.check_important(
+                    lines
+                )
+
+                # the first section to reach print_section defines 'all hosts'
+                reaches_print_section = section_word == "PLAY RECAP" or (
+                    important and section_word in ["TASK", "HANDLER"]
+                )
+                if all_hosts is None and reaches_print_section and statuses:
+                    all_hosts = [host_ids[host] for host in statuses]
+
+                counts: dict[str, int] = {}
+                listed: dict[str, list[int]] = {}
+                for host, status in statuses.items():
+                    counts[status] = counts.get(status, 0) + 1
+                    if status in IMPORTANT_STATUSES:
+                        listed.setdefault(status, []).append(host_ids[host])
+
+                sections.append(
+                    {
+                        "offset": start,
+                        "length": end - start,
+                        "section": section_word,
+                        "name": lines[0].strip().rstrip("*").strip() if lines else "",
+                        "important": important,
+                        "counts": counts,
+                        "hosts": listed,
+                    }
+                )
+                if isinstance(lines, SpilledLines):
+                    lines.close()
+
+        return cls(sections, list(host_ids), all_hosts or [], file_identity(path))
+
+    @classmethod
+    def load(cls, index_path: str | os.PathLike) -> SectionIndex:
+        """Load an index saved with save()."""
+        with open(index_path) as index_file:
+            contents = json.load(index_file)
+        if contents.get("version") != INDEX_VERSION:
+            msg = f"unsupported index version in {index_path}"
+            raise ValueError(msg)
+        return cls(
+            contents["sections"],
+            contents["host_names"],
+            contents["hosts"],
+            contents["identity"],
+        )
+
+    @classmethod
+    def load_or_build(
+        cls,
+        path: str | os.PathLike,
+        index_path: str | os.PathLike | None = None,
+        section_memory: int | None = None,
+    ) -> SectionIndex | None:
+        """Load the index for a log file, (re)building it when it's missing or stale.
+
+        Returns None for logs that can't be indexed (see can_index()).  An
+        index that can't be saved is still returned.
+        """
+        if not can_index(path):
+            return None
+
+        if index_path is None:
+            index_path = default_index_path(path)
+
+        if Path(index_path).exists():
+            try:
+                index = cls.load(index_path)
+                if index.matches(path):
+                    return index
+            except (ValueError, KeyError):
+                pass
+
+        index = cls.build(path, section_memory)
+        try:
+            index.save(index_path)
+        except OSError as exception:
+            warning(f"not saving the index of {path}: {exception}")
+        return index
+
+    def save(self, index_path: str | os.PathLike) -> None:
+        """Save the index as JSON."""
+        contents = {
+            "version": INDEX_VERSION,
+            "identity": self.identity,
+            "host_names": self.host_names,
+            "hosts": self.hosts,
+            "sections": self.sections,
+        }
+        with open(index_path, "w") as index_file:
+            json.dump(contents, index_file, separators=(",", ":"))
+
+    def matches(self, path: str | os.PathLike) -> bool:
+        """Decide whether the index still describes a log file."""
+        return file_identity(path) == self.identity
+
+    @property
+    def all_hosts(self) -> list[str]:
+        """The host list used for 'all hosts' reports."""
+        return [self.host_names[host_id] for host_id in self.hosts]
+
+    def section_hosts(self, section: dict) -> dict[str, list[str]]:
+        """Return the hosts listed for a section, by status."""
+        return {
+            status: [self.host_names[host_id] for host_id in host_ids]
+            for status, host_ids in section["hosts"].items()
+        }
+
+    def select(self, task: str | None = None, host: str | None = None) -> list[dict]:
+        """Find the sections whose name matches a regex and/or that list a host.
+
+        Hosts are only listed for sections where their status was changed,
+        failed or fatal.
+        """
+        task_regex = re.compile(task) if task else None
+        host_id = None
+        if host is not None:
+            if host not in self.host_names:
+                return []
+            host_id = self.host_names.index(host)
+
+        selected = []
+        for section in self.sections:
+            if task_regex and not task_regex.search(section["name"]):
+                continue
+            if host_id is not None and not any(
+                host_id in host_ids for host_ids in section["hosts"].values()
+            ):
+                continue
+            selected.append(section)
+        return selected
+
+
+def default_index_path(path: str | os.PathLike) -> str:
+    """Return where the index for a log file is kept by default."""
+    return str(path) + INDEX_SUFFIX
@@ -0,0 +1,108 @@
+"""Structured JSON Lines output of the important sections of ansible logs."""
+
+from __future__ import annotations
+from typing import Iterable
+import json
+
+from ansible_less import IMPORTANT_STATUSES, AnsibleLess, ClassifiedLine
+
+
+class AnsibleLessJSON(AnsibleLess):
+    """Emits one JSON record per important section instead of formatted text.
+
+    Each task record carries the task name, the hosts for each status,
+    the clustered output blocks with the hosts that produced them and any
+    warnings that followed the task.  Warnings following a task that
+    wasn't important are emitted as their own "warning" records.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Create an AnsibleLessJSON instance."""
+        super().__init__(*args, **kwargs)
+        self.pending_record: dict | None = None
+        self.last_task: str | None = None
+
+    def emit(self, record: dict) -> None:
+        """Write a single JSON record."""
+        self.print(json.dumps(record))
+
+    def flush_record(self) -> None:
+        """Emit the task record waiting for any warnings that follow it."""
+        if self.pending_record:
+            self.emit(self.pending_record)
+            self.pending_record = None
+
+    def process_line(self, line: str) -> None:
+        """Add a line, emitting the waiting task record once it can't get warnings."""
+        super().process_line(line)
+        # (only warnings right after a task are added to its record)
+        if len(self.current_lines) == 1 and self.last_section != "[WARNING]:":
+            self.flush_record()
+
+    def flush_section(self) -> None:
+        """Emit the in-progress section and any waiting task record."""
+        super().flush_section()
+        self.flush_record()
+
+    def print_header(self, lines: list[str]) -> None:
+        """Headers aren't part of the structured output."""
+        return
+
+    def print_trailer(self, lines: list[str]) -> None:
+        """Finish the output at the end of the log."""
+        self.flush_record()
+
+    def maybe_print_task(self, lines: list[str | ClassifiedLine]) -> None:
+        """Emit a record for a task if it's important."""
+        records = self.classify_lines(lines)
+        self.flush_record()
+        self.last_task = records[0].clean if records else None
+        super().maybe_print_task(records)
+
+    def print_section(self, lines: list[str | ClassifiedLine]) -> None:
+        """Build the record for a section from its host groupings."""
+        records = self.classify_lines(lines)
+        self.flush_record()
+        if not records:
+            return
+
+        self.print_groupings(self.display_text(records[0]), self.group_section(records))
+
+    def print_groupings(self, task_line: str, groupings: dict[str, dict]) -> None:
+        """Build the record for a task if any host's status is important."""
+        self.flush_record()
+        if not self.display_all_sections and not any(
+            grouping["status"] in IMPORTANT_STATUSES for grouping in groupings.values()
+        ):
+            return
+
+        statuses: dict[str, list[str]] = {}
+        for host, grouping in groupings.items():
+            statuses.setdefault(grouping["status"], []).append(host)
+
+        self.pending_record = {
+            "type": "task",
+            "task": task_line.strip().rstrip("*").strip(),
+            "statuses": statuses,
+            "outputs": [
+                {
+                    "hosts": cluster,
+                    "lines": [
+                        line.rstrip("\n") for line in groupings[cluster[0]]["lines"]
+                    ],
+                }
+                for cluster in self.cluster_hosts(groupings)
+            ],
+            "warnings": [],
+        }
+
+    def print_warning(self, lines: Iterable[str | ClassifiedLine]) -> None:
+        """Attach warnings to the task before them."""
+        warnings = list(self.iter_warnings(lines))
+        if not warnings:
+            return
+
+        if self.pending_record:
+            self.pending_record["warnings"].extend(warnings)
+        else:
+            self.emit({"type": "warning", "task": self.last_task, "warnings": warnings})
@@ -0,0 +1,61 @@
+"""Streaming output into a pager as it's produced."""
+
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import IO, Iterator
+import os
+import shlex
+import subprocess
+import sys
+
+DEFAULT_PAGER = "less"
+
+
+def pager_command() -> list[str]:
+    """Return the pager to run, from $PAGER or else less."""
+    return shlex.split(os.environ.get("PAGER") or DEFAULT_PAGER)
+
+
+@contextmanager
+def pager_output(command: list[str] | None = None) -> Iterator[IO[str]]:
+    """Run a pager and yield a text stream that feeds it.
+
+    Output reaches the pager as soon as it's written, and writes block
+    while the pager's pipe is full, so reading the log keeps pace with
+    the pager.  If the pager is quit early, the next write raises
+    BrokenPipeError, which ends the block quietly.  Without a working
+    pager, stdout is used instead.
+    """
+    if command is None:
+        command = pager_command()
+
+    try:
+        pager = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            bufsize=1,  # (line buffered, so each printed section is sent at once)
+            encoding=sys.stdout.encoding or "utf-8",
+            errors="replace",
+        )
+    except OSError:
+        yield sys.stdout
+        return
+
+    try:
+        yield pager.stdin
+    except BrokenPipeError:
+        pass  # the pager was quit before everything was written
+    except KeyboardInterrupt:
+        pass  # (^C in the pager reaches us too, and just stops processing)
+    finally:
+        try:
+            pager.stdin.close()
+        except BrokenPipeError:
+            pass
+        # wait for the user to quit the pager
+        while True:
+            try:
+                pager.wait()
+                break
+            except KeyboardInterrupt:
+                continue
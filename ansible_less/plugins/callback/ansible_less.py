@@ -0,0 +1,91 @@
+"""An ansible stdout callback plugin that prints ansible-less summaries."""
+
+from __future__ import annotations
+
+from ansible_less import AnsibleLess
+from ansible_less.callback import ResultSummarizer
+
+try:
+    from ansible.plugins.callback import CallbackBase
+except Exception:
+
+    class CallbackBase:
+        """A stand-in allowing use (and testing) without ansible installed."""
+
+        def __init__(self, display=None, options=None):
+            self._display = display
+
+DOCUMENTATION = """
+    name: ansible_less
+    type: stdout
+    short_description: only show the interesting parts of each task
+    description:
+      - Groups each task's results by host, collapses identical output
+        and drops tasks where every host was ok or skipped, like the
+        ansible-less log viewer does.
+"""
+
+
+class DisplayWriter:
+    """Writes AnsibleLess output through ansible's display."""
+
+    def __init__(self, display):
+        """Create a DisplayWriter."""
+        self.display = display
+
+    def write(self, data: str) -> None:
+        """Display one chunk of output."""
+        self.display.display(data.rstrip("\n"))
+
+
+class CallbackModule(CallbackBase):
+    """Feeds task results straight to a ResultSummarizer."""
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = "stdout"
+    CALLBACK_NAME = "ansible_less"
+
+    def __init__(self, *args, **kwargs):
+        """Create the callback plugin."""
+        super().__init__(*args, **kwargs)
+        self.summarizer = ResultSummarizer(
+            AnsibleLess(output_to=DisplayWriter(self._display))
+        )
+
+    def handle_result(self, event: str, result) -> None:
+        """Pass an ansible TaskResult on to the summarizer."""
+        self.summarizer.handle(
+            {"event": event, "host": result._host.get_name(), "result": result._result}
+        )
+
+    def v2_playbook_on_play_start(self, play) -> None:
+        self.summarizer.handle({"event": "playbook_on_play_start", "name": play.get_name()})
+
+    def v2_playbook_on_task_start(self, task, is_conditional) -> None:
+        self.summarizer.handle(
+            {"event": "playbook_on_task_start", "name": task.get_name().strip()}
+        )
+
+    def v2_playbook_on_handler_task_start(self, task) -> None:
+        self.summarizer.handle(
+            {
+                "event": "playbook_on_task_start",
+                "name": task.get_name().strip(),
+                "handler": True,
+            }
+        )
+
+    def v2_runner_on_ok(self, result) -> None:
+        self.handle_result("runner_on_ok", result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False) -> None:
+        self.handle_result("runner_on_failed", result)
+
+    def v2_runner_on_skipped(self, result) -> None:
+        self.handle_result("runner_on_skipped", result)
+
+    def v2_runner_on_unreachable(self, result) -> None:
+        self.handle_result("runner_on_unreachable", result)
+
+    def v2_playbook_on_stats(self, stats) -> None:
+        self.summarizer.handle({"event": "playbook_on_stats"})
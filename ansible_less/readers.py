@@ -0,0 +1,169 @@
+"""Helpers for opening ansible log files, compressed or not."""
+
+from __future__ import annotations
+from importlib.util import find_spec
+import io
+import os
+
+# magic bytes at the start of each supported compression format
+COMPRESSION_MAGIC = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bz2",
+    b"\xfd7zXZ\x00": "xz",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+
+READ_BUFFER_SIZE = 1024 * 1024
+
+ZSTD_MISSING = "install the 'zstandard' package to read zstd compressed logs"
+
+
+class DecompressorMissingError(ValueError):
+    """A log's compression format needs a module that isn't installed."""
+
+
+def detect_compression(data: bytes) -> str | None:
+    """Return the compression format that data starts with, if any."""
+    for magic, compression in COMPRESSION_MAGIC.items():
+        if data.startswith(magic):
+            return compression
+    return None
+
+
+def file_compression(path: str | os.PathLike) -> str | None:
+    """Return the compression format of a file, if it's compressed."""
+    with open(path, "rb") as binary:
+        return detect_compression(binary.read(6))
+
+
+def can_decompress(compression: str) -> bool:
+    """Decide whether the modules needed for a compression format are installed."""
+    if compression != "zstd":
+        return True
+    for module in ["compression.zstd", "zstandard"]:  # (the first is python 3.14+)
+        try:
+            if find_spec(module) is not None:
+                return True
+        except ImportError:
+            pass
+    return False
+
+
+def open_zstd(binary: io.BufferedIOBase) -> io.BufferedIOBase:
+    """Open a streaming zstd decompressor, using whichever module is available."""
+    try:
+        from compression import zstd  # python 3.14+
+
+        return zstd.ZstdFile(binary)
+    except ImportError:
+        pass
+
+    try:
+        import zstandard
+    except ImportError as exception:
+        raise DecompressorMissingError(ZSTD_MISSING) from exception
+
+    return zstandard.ZstdDecompressor().stream_reader(binary, read_across_frames=True)
+
+
+def decompress(binary: io.BufferedIOBase, compression: str) -> io.BufferedIOBase:
+    """Wrap a binary stream with a streaming decompressor."""
+    # (each module is only imported when a log needs it)
+    if compression == "gzip":
+        import gzip
+
+        return gzip.GzipFile(fileobj=binary)
+    if compression == "bz2":
+        import bz2
+
+        return bz2.BZ2File(binary)
+    if compression == "xz":
+        import lzma
+
+        return lzma.LZMAFile(binary)
+    return open_zstd(binary)
+
+
+def open_log(source):
+    """Return a text stream of log lines, decompressing the source if needed.
+
+    The source may be a path, a binary stream or a text stream (such as
+    sys.stdin); the compression format is detected from its first bytes.
+    Anything else (like a list of lines) is returned unchanged.
+    """
+    text_stream = None
+    if isinstance(source, (str, os.PathLike)):
+        binary = open(source, "rb", buffering=READ_BUFFER_SIZE)  # noqa: SIM115
+    elif isinstance(getattr(source, "buffer", None), io.BufferedIOBase):
+        text_stream = source
+        binary = source.buffer
+    elif isinstance(source, (io.BufferedIOBase, io.RawIOBase)):
+        binary = source
+    else:
+        return source
+
+    if not hasattr(binary, "peek"):
+        binary = io.BufferedReader(binary, READ_BUFFER_SIZE)
+
+    compression = detect_compression(binary.peek(6)[:6])
+    if compression:
+        binary = io.BufferedReader(decompress(binary, compression), READ_BUFFER_SIZE)
+    elif text_stream:
+        return text_stream
+
+    return io.TextIOWrapper(binary, encoding="utf-8", errors="replace")
+
+
+def new_decompressor(compression: str):
+    """Return an incremental decompressor object for a compression format."""
+    if compression == "gzip":
+        import zlib
+
+        return zlib.decompressobj(zlib.MAX_WBITS | 16)
+    if compression == "bz2":
+        import bz2
+
+        return bz2.BZ2Decompressor()
+    if compression == "xz":
+        import lzma
+
+        return lzma.LZMADecompressor()
+
+    try:
+        from compression import zstd  # python 3.14+
+
+        return zstd.ZstdDecompressor()
+    except ImportError:
+        pass
+
+    try:
+        import zstandard
+    except ImportError as exception:
+        raise DecompressorMissingError(ZSTD_MISSING) from exception
+
+    return zstandard.ZstdDecompressor().decompressobj()
+
+
+class StreamDecompressor:
+    """Decompresses data as it arrives, such as from a log being followed.
+
+    Concatenated streams (like appended gzip members) are decompressed
+    one after another.
+    """
+
+    def __init__(self, compression: str):
+        """Create a StreamDecompressor."""
+        self.compression = compression
+        self.decompressor = new_decompressor(compression)
+
+    def decompress(self, data: bytes) -> bytes:
+        """Return as much of the decompressed data as is available so far."""
+        output = []
+        while data:
+            output.append(self.decompressor.decompress(data))
+            if not getattr(self.decompressor, "eof", False):
+                break
+            # the stream ended, so anything after it starts another one
+            data = self.decompressor.unused_data
+            self.decompressor = new_decompressor(self.compression)
+        return b"".join(output)
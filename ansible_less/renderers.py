@@ -0,0 +1,169 @@
+"""Renderers that write AnsibleLess output as plain text or to a rich console."""
+
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import IO, Iterator
+
+BUFFER_SIZE = 65536
+
+# rich styles for status lines, by status
+STATUS_STYLES = {
+    "fatal": "bold red",
+    "failed": "red",
+    "changed": "yellow",
+    "ok": "green",
+    "skipping": "cyan",
+}
+
+HEADING_STYLE = "bold"
+
+
+class PlainRenderer:
+    """Writes plain text to a file, batching it into large writes.
+
+    Output is written straight through unless inside batched(), where it
+    is collected until BUFFER_SIZE characters are waiting.
+    """
+
+    def __init__(self, output_to: IO[str], buffer_size: int = BUFFER_SIZE):
+        """Create a PlainRenderer."""
+        self.output_to = output_to
+        self.buffer_size = buffer_size
+        self.batching = 0
+        self.pending: list[str] = []
+        self.pending_size = 0
+
+    def write(self, text: str) -> None:
+        """Write text as is."""
+        if not self.batching:
+            self.output_to.write(text)
+            return
+
+        self.pending.append(text)
+        self.pending_size += len(text)
+        if self.pending_size >= self.buffer_size:
+            self.write_pending()
+
+    def print(self, text: str) -> None:
+        """Write text followed by a newline."""
+        self.write(text + "\n")
+
+    def heading(self, text: str) -> None:
+        """Write a task heading."""
+        self.write("==== " + text + "\n")
+
+    def block(self, pieces: list[tuple[str, str | None]]) -> None:
+        """Write a block of (text, status) pieces followed by a newline."""
+        self.write("".join(text for (text, _status) in pieces) + "\n")
+
+    def write_pending(self) -> None:
+        """Write out any batched text."""
+        if self.pending:
+            self.output_to.write("".join(self.pending))
+            self.pending = []
+            self.pending_size = 0
+
+    def flush(self) -> None:
+        """Write out any batched text and flush the output file."""
+        self.write_pending()
+        flush = getattr(self.output_to, "flush", None)
+        if flush:
+            flush()
+
+    @contextmanager
+    def batched(self) -> Iterator[None]:
+        """Collect writes into large chunks until the context ends."""
+        self.batching += 1
+        try:
+            yield
+        finally:
+            self.batching -= 1
+        if not self.batching:
+            self.write_pending()
+
+
+class RichRenderer:
+    """Prints to a rich console, styling only headings and status lines.
+
+    Everything else is printed as is, without rich markup parsing or
+    highlighting.
+    """
+
+    def __init__(self, console):
+        """Create a RichRenderer."""
+        self.console = console
+
+    def write(self, text: str) -> None:
+        """Print text as is."""
+        self.console.out(text, end="", highlight=False)
+
+    def print(self, text: str) -> None:
+        """Print text followed by a newline."""
+        self.console.out(text, highlight=False)
+
+    def heading(self, text: str) -> None:
+        """Print a task heading."""
+        self.console.out("==== " + text, style=HEADING_STYLE, highlight=False)
+
+    def block(self, pieces: list[tuple[str, str | None]]) -> None:
+        """Print a block of (text, status) pieces, styling the status lines."""
+        from rich.text import Text
+
+        text = Text()
+        for (piece, status) in pieces:
+            text.append(piece, STATUS_STYLES.get(status))
+        self.console.print(text, soft_wrap=True, highlight=False)
+
+    def flush(self) -> None:
+        """Rich consoles write their own output."""
+        return
+
+    @contextmanager
+    def batched(self) -> Iterator[None]:
+        """Rich consoles do their own buffering."""
+        yield
+
+
+class CapturedRenderer:
+    """Records rendering calls so they can be replayed on another renderer."""
+
+    def __init__(self):
+        """Create a CapturedRenderer."""
+        self.calls: list[tuple[str, object]] = []
+
+    def write(self, text: str) -> None:
+        """Record some text."""
+        self.calls.append(("write", text))
+
+    def print(self, text: str) -> None:
+        """Record a line of text."""
+        self.calls.append(("print", text))
+
+    def heading(self, text: str) -> None:
+        """Record a task heading."""
+        self.calls.append(("heading", text))
+
+    def block(self, pieces: list[tuple[str, str | None]]) -> None:
+        """Record a block of text."""
+        self.calls.append(("block", pieces))
+
+    def flush(self) -> None:
+        """Nothing is written, so there's nothing to flush."""
+        return
+
+    @contextmanager
+    def batched(self) -> Iterator[None]:
+        """Everything is kept until take() anyway."""
+        yield
+
+    def take(self) -> list[tuple[str, object]]:
+        """Return and forget every recorded call."""
+        (calls, self.calls) = (self.calls, [])
+        return calls
+
+
+def renderer_for(output_to):
+    """Return the renderer for an output: rich consoles have a print method."""
+    if getattr(output_to, "print", None):
+        return RichRenderer(output_to)
+    return PlainRenderer(output_to)
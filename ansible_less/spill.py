@@ -0,0 +1,178 @@
+"""Keeping oversized sections and host outputs within a memory budget."""
+
+from __future__ import annotations
+from typing import Callable, Iterable, Iterator
+import hashlib
+import tempfile
+
+SPILL_CHUNK_SIZE = 1024 * 1024
+
+# how many lines of a host's output are held before truncating them
+TRUNCATE_BATCH_LINES = 10000
+
+
+class SpillFile:
+    """An anonymous temporary file that lines are appended to in batches."""
+
+    def __init__(self):
+        """Create a SpillFile."""
+        self.file = tempfile.TemporaryFile()  # noqa: SIM115
+        self.pending: list[bytes] = []
+        self.pending_size = 0
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        """Append some data, writing it out once a chunk's worth is waiting."""
+        self.pending.append(data)
+        self.pending_size += len(data)
+        if self.pending_size >= SPILL_CHUNK_SIZE:
+            self.write_pending()
+
+    def write_pending(self) -> None:
+        """Write out any data waiting to be written."""
+        if self.pending:
+            self.file.seek(0, 2)
+            self.file.write(b"".join(self.pending))
+            self.size += self.pending_size
+            self.pending = []
+            self.pending_size = 0
+
+    def iter_lines(self) -> Iterator[str]:
+        """Read back every line written so far, a chunk at a time."""
+        self.write_pending()
+        (offset, end) = (0, self.size)
+        partial = b""
+        while offset < end:
+            # (seek each time, since other readers may share the file)
+            self.file.seek(offset)
+            chunk = self.file.read(min(SPILL_CHUNK_SIZE, end - offset))
+            offset += len(chunk)
+            lines = (partial + chunk).split(b"\n")
+            partial = lines.pop()
+            for line in lines:
+                yield line.decode("utf-8", "surrogateescape") + "\n"
+        if partial:
+            yield partial.decode("utf-8", "surrogateescape")
+
+    def close(self) -> None:
+        """Close (and so delete) the file."""
+        self.file.close()
+
+
+class SpilledLines:
+    """The lines of a section too big to keep in memory.
+
+    The first line (the task line) stays in memory and the rest are
+    written to a temporary file, which is read again each time the lines
+    are iterated.  map() returns a view of the same lines that transforms
+    each one as it's read.
+    """
+
+    def __init__(self, lines: Iterable[str] = ()):
+        """Create a SpilledLines holding lines."""
+        self.first: str | None = None
+        self.count = 0
+        self.spill_file = SpillFile()
+        self.transform: Callable | None = None
+        self.extend(lines)
+
+    def append(self, line: str) -> None:
+        """Add a line."""
+        if self.count == 0:
+            self.first = line
+        else:
+            self.spill_file.write(line.encode("utf-8", "surrogateescape"))
+        self.count += 1
+
+    def extend(self, lines: Iterable[str]) -> None:
+        """Add some lines."""
+        for line in lines:
+            self.append(line)
+
+    def map(self, function: Callable) -> SpilledLines:
+        """Return a view of these lines with function applied to each."""
+        # (not copy.copy(), which would use __reduce__ and make a list)
+        view = object.__new__(SpilledLines)
+        view.__dict__.update(self.__dict__)
+        view.transform = function
+        return view
+
+    def __len__(self) -> int:
+        """Return the number of lines."""
+        return self.count
+
+    def __getitem__(self, index: int):
+        """Return the first line, the only one kept in memory."""
+        if self.count and index in (0, -self.count):
+            return self.transform(self.first) if self.transform else self.first
+        msg = "only the first of a section's spilled lines can be indexed"
+        raise IndexError(msg)
+
+    def __iter__(self) -> Iterator:
+        """Yield the lines, reading all but the first from the file."""
+        if self.count == 0:
+            return
+        yield self[0]
+        lines = self.spill_file.iter_lines()
+        if self.transform:
+            lines = map(self.transform, lines)
+        yield from lines
+
+    def __reduce__(self):
+        """Pickle as a plain list (such as for a worker process)."""
+        return (list, (list(self),))
+
+    def close(self) -> None:
+        """Discard the spilled lines."""
+        self.spill_file.close()
+
+
+class TruncatedLines(list):
+    """A host's output lines, keeping only the first `max_lines` of them.
+
+    Later lines are only counted and added to a rolling digest.  finish()
+    returns the kept lines followed by a marker line holding the count
+    and digest of the rest, so hosts whose oversized outputs are
+    identical still cluster together.
+    """
+
+    def __init__(self, max_lines: int, lines: Iterable[str] = ()):
+        """Create a TruncatedLines."""
+        super().__init__()
+        self.max_lines = max_lines
+        self.more = 0
+        self.digest = None
+        self.extend(lines)
+
+    def append(self, line: str) -> None:
+        """Add a line, or just its digest once max_lines are kept."""
+        if self.digest is None:
+            if len(self) < self.max_lines:
+                super().append(line)
+                return
+            self.digest = hashlib.blake2b(digest_size=8)
+        self.digest.update(line.encode("utf-8", "surrogateescape"))
+        self.more += 1
+
+    def extend(self, lines: Iterable[str]) -> None:
+        """Add some lines."""
+        for line in lines:
+            self.append(line)
+
+    def absorb(self, other: TruncatedLines) -> None:
+        """Add the kept lines and the digest of another TruncatedLines."""
+        self.extend(other)
+        if other.digest is not None:
+            if self.digest is None:
+                self.digest = hashlib.blake2b(digest_size=8)
+            self.digest.update(other.digest.digest())
+            self.more += other.more
+
+    def finish(self) -> list[str]:
+        """Return the kept lines, with a marker for any that were dropped."""
+        lines = list(self)
+        if self.digest is not None:
+            lines.append(
+                f"... {self.more} more lines, digest {self.digest.hexdigest()}\n"
+            )
+        return lines
@@ -0,0 +1,102 @@
+"""Per-phase timing and section counters for ansible-less runs."""
+
+from __future__ import annotations
+from collections import defaultdict
+from itertools import islice
+from typing import IO, Iterable, Iterator
+import time
+
+READ_BATCH_SIZE = 4096
+
+# the phases reported, in pipeline order
+PHASES = [
+    "read",
+    "split",
+    "classify",
+    "check_important",
+    "group_by_hosts",
+    "cluster_hosts",
+    "render",
+]
+
+
+class Stats:
+    """Collects per-phase timers and section counters.
+
+    Everything here is only touched when an AnsibleLess instance has been
+    given a Stats object, so there's no cost when statistics are off.
+    """
+
+    def __init__(self):
+        """Create an empty Stats collection."""
+        self.timers: dict[str, float] = defaultdict(float)
+        self.counters: dict[str, int] = defaultdict(int)
+        self.largest_section: dict = {"lines": 0, "section": None}
+        self.host_count: int = 0
+
+    def add_time(self, phase: str, start: float) -> None:
+        """Add the time since start (from time.perf_counter()) to a phase."""
+        self.timers[phase] += time.perf_counter() - start
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Increment a counter."""
+        self.counters[name] += amount
+
+    def add_section(self, section_word: str, lines: list) -> None:
+        """Record that a section was seen."""
+        self.counters["sections_seen"] += 1
+        self.counters[f"sections_seen_{section_word}"] += 1
+        if len(lines) > self.largest_section["lines"]:
+            first_line = lines[0] if lines else ""
+            self.largest_section = {
+                "lines": len(lines),
+                "section": str(getattr(first_line, "line", first_line)).strip(),
+            }
+
+    def add_hosts(self, host_count: int) -> None:
+        """Record the number of hosts found in a section."""
+        self.host_count = max(self.host_count, host_count)
+
+    def timed_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """Yield lines while timing how long reading them takes."""
+        # timing batches rather than single lines keeps the overhead low
+        iterator = iter(lines)
+        while True:
+            start = time.perf_counter()
+            batch = list(islice(iterator, READ_BATCH_SIZE))
+            self.add_time("read", start)
+            if not batch:
+                return
+            self.counters["lines"] += len(batch)
+            yield from batch
+
+    def report(self) -> dict:
+        """Return all the collected statistics."""
+        timers = dict(self.timers)
+        total = timers.get("total")
+        if total is not None:
+            # splitting (and any other glue) is what the phases don't cover
+            measured = sum(timers.get(phase, 0.0) for phase in PHASES)
+            timers["split"] = max(total - measured, 0.0)
+
+        return {
+            "timers": timers,
+            "counters": dict(self.counters),
+            "largest_section": self.largest_section,
+            "host_count": self.host_count,
+        }
+
+    def write(self, output_to: IO[str]) -> None:
+        """Write a human readable summary of the statistics."""
+        report = self.report()
+        output_to.write("ansible-less statistics:\n")
+        for phase in [*PHASES, "total"]:
+            if phase in report["timers"]:
+                output_to.write(f"  {phase:>26}: {report['timers'][phase]:10.3f}s\n")
+        for name, value in sorted(report["counters"].items()):
+            output_to.write(f"  {name:>26}: {value:10d}\n")
+        output_to.write(f"  {'hosts':>26}: {report['host_count']:10d}\n")
+        largest = report["largest_section"]
+        output_to.write(
+            f"  {'largest section':>26}: {largest['lines']:10d} lines ({largest['section']})\n"
+        )
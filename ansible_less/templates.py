@@ -0,0 +1,81 @@
+"""Grouping host outputs that differ only in variable tokens."""
+
+from __future__ import annotations
+from typing import Iterable
+import re
+
+# variable tokens, tried in order at each position
+VARIABLE_RE = re.compile(
+    r"""
+    (?P<ip>\b\d{1,3}(?:\.\d{1,3}){3}\b
+      |(?<![\w:])(?=[0-9a-f:]*::|(?:[0-9a-f]{1,4}:){7})(?=[0-9a-f:]*[0-9a-f])
+       [0-9a-f]{0,4}(?::[0-9a-f]{0,4}){2,7}(?![\w:]))
+    |(?P<uuid>\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b)
+    |(?P<hex>\b(?=[a-f]*\d)(?=\d*[a-f])[0-9a-f]{8,}\b)
+    |(?P<host>\b(?=[\w-]*[a-z])[a-z0-9][\w-]*(?:\.[a-z0-9][\w-]*)+\b)
+    |(?P<num>\d+)
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+
+# marks where a variable token was in a template
+SLOT = "\0"
+
+
+def output_template(lines: Iterable[str]) -> tuple[str, tuple[str, ...], list[str]]:
+    """Split output into its template, the kinds of its variables and their values.
+
+    The template is the text with each variable token (an IP address,
+    UUID, hex id, host name or number) replaced by a marker.
+    """
+    kinds: list[str] = []
+    values: list[str] = []
+
+    def abstract(match: re.Match) -> str:
+        kinds.append(match.lastgroup)
+        values.append(match.group(0))
+        return SLOT
+
+    text = "".join(lines).replace(SLOT, "")
+    return (VARIABLE_RE.sub(abstract, text), tuple(kinds), values)
+
+
+def cluster_templates(
+    clusters: list[list[str]], groupings: dict[str, dict]
+) -> list[list[tuple[list[str], list[str]]]]:
+    """Merge clusters of hosts whose outputs share a template.
+
+    clusters hold hosts with identical output (from cluster_hosts()).
+    Each one's output is reduced to a template once, and clusters are
+    grouped by it in a dict, so there's no pairwise comparison.  Returns
+    lists of (hosts, values) pairs, in order of first appearance.
+    """
+    templates: dict[tuple[str, tuple[str, ...]], list] = {}
+    for hosts in clusters:
+        (template, kinds, values) = output_template(groupings[hosts[0]]["lines"])
+        templates.setdefault((template, kinds), []).append((hosts, values))
+    return list(templates.values())
+
+
+def fill_template(
+    lines: Iterable[str], members: list[tuple[list[str], list[str]]]
+) -> tuple[str, list[int]]:
+    """Return output text with only the values that vary as placeholders.
+
+    lines are the output of any member, and members are (hosts, values)
+    pairs as returned by cluster_templates().  Also returns the positions
+    of the varying values.
+    """
+    (template, kinds, _values) = output_template(lines)
+    pieces = template.split(SLOT)
+    text = [pieces[0]]
+    varying = []
+    for slot, kind in enumerate(kinds):
+        first_value = members[0][1][slot]
+        if all(values[slot] == first_value for (_hosts, values) in members):
+            text.append(first_value)
+        else:
+            text.append(f"<{kind}>")
+            varying.append(slot)
+        text.append(pieces[slot + 1])
+    return ("".join(text), varying)
@@ -0,0 +1,35 @@
+import io
+
+from ansible_less import AnsibleLess
+from ansible_less.benchmark import (
+    benchmark_report,
+    compare_reports,
+    generate_log,
+    run_benchmarks,
+)
+
+
+def test_generate_log():
+    lines = generate_log(host_count=5, task_count=10, warning_rate=1.0, seed=1)
+    assert sum(1 for line in lines if "| TASK [" in line) == 10
+    assert sum(1 for line in lines if "[WARNING]:" in line) == 10
+    assert generate_log(host_count=5, task_count=10, seed=1) == generate_log(
+        host_count=5, task_count=10, seed=1
+    )
+
+    # the generated log parses into the expected hosts
+    al = AnsibleLess(output_to=io.StringIO())
+    al.process(lines)
+    assert al.hosts == [f"host{number}.example.com" for number in range(5)]
+
+
+def test_run_benchmarks():
+    lines = generate_log(host_count=3, task_count=5)
+    results = run_benchmarks(lines, repeat=1)
+    for phase in ["process", "group_by_hosts", "filter_lines", "print_section"]:
+        assert results[phase]["lines_per_second"] > 0
+        assert results[phase]["sections"] == 5
+        assert results[phase]["peak_memory_bytes"] > 0
+
+    report = benchmark_report({}, results)
+    assert set(compare_reports(report, report).values()) == {1.0}
@@ -0,0 +1,101 @@
+import io
+
+from ansible_less import AnsibleLess
+from ansible_less.callback import ResultSummarizer, result_lines
+from ansible_less.plugins.callback.ansible_less import CallbackModule
+
+DIFF = {
+    "before": "a\nb\n",
+    "after": "a\nc\n",
+    "before_header": "/etc/motd",
+    "after_header": "/etc/motd",
+}
+
+EVENTS = [
+    {"event": "playbook_on_play_start", "name": "all", "hosts": ["h1", "h2", "h3"]},
+    {"event": "playbook_on_task_start", "name": "boring task"},
+    {"event": "runner_on_ok", "host": "h1", "result": {"changed": False}},
+    {"event": "runner_on_ok", "host": "h2", "result": {"changed": False}},
+    {"event": "runner_on_skipped", "host": "h3", "result": {}},
+    {"event": "playbook_on_task_start", "name": "copy motd"},
+    {"event": "runner_on_ok", "host": "h1", "result": {"changed": True, "diff": DIFF}},
+    {"event": "runner_on_ok", "host": "h2", "result": {"changed": True, "diff": DIFF}},
+    {
+        "event": "runner_on_failed",
+        "host": "h3",
+        "result": {"msg": "permission denied", "warnings": ["check perms"]},
+    },
+    {"event": "playbook_on_stats"},
+]
+
+
+def test_result_lines():
+    assert result_lines("changed", {"diff": DIFF}) == [
+        "--- before: /etc/motd\n",
+        "+++ after: /etc/motd\n",
+        "@@ -1,2 +1,2 @@\n",
+        " a\n",
+        "-b\n",
+        "+c\n",
+    ]
+    assert result_lines("changed", {"diff": {"prepared": "x\ny"}}) == ["x\n", "y"]
+    assert result_lines("ok", {"msg": "fine"}) == []
+    assert result_lines("fatal", {"msg": "oops", "stderr_lines": ["e"]}) == [
+        "oops\n",
+        "e\n",
+    ]
+
+
+def test_summarizer_events():
+    output = io.StringIO()
+    summarizer = ResultSummarizer(AnsibleLess(output_to=output))
+    summarizer.handle_all(EVENTS)
+    results = output.getvalue()
+
+    # tasks where every host was ok or skipped are dropped
+    assert "boring task" not in results
+    assert "==== TASK [copy motd]" in results
+
+    # the failure comes first and the identical diffs are shown once
+    assert results.index("fatal: h3") < results.index("changed: h1")
+    assert results.index("changed: h1") < results.index("changed: h2")
+    assert results.count("+c\n") == 1
+    assert "permission denied" in results
+    assert "[WARNING]: check perms" in results
+
+
+class FakeDisplay:
+    def __init__(self):
+        self.lines = []
+
+    def display(self, msg):
+        self.lines.append(msg)
+
+
+class FakeName:
+    def __init__(self, name):
+        self.name = name
+
+    def get_name(self):
+        return self.name
+
+
+class FakeResult:
+    def __init__(self, host, result):
+        self._host = FakeName(host)
+        self._result = result
+
+
+def test_callback_module():
+    display = FakeDisplay()
+    callback = CallbackModule(display=display)
+    callback.v2_playbook_on_play_start(FakeName("all"))
+    callback.v2_playbook_on_task_start(FakeName("copy motd "), False)
+    callback.v2_runner_on_ok(FakeResult("h1", {"changed": True, "diff": DIFF}))
+    callback.v2_runner_on_ok(FakeResult("h2", {"changed": False}))
+    callback.v2_playbook_on_stats(None)
+
+    output = "\n".join(display.lines)
+    assert "==== TASK [copy motd]" in output
+    assert "changed: h1" in output
+    assert "+c" in output
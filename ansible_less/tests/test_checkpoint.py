@@ -0,0 +1,86 @@
+import io
+import json
+
+import pytest
+
+from ansible_less import AnsibleLess
+
+FIRST_RUN = [
+    "PLAY [all] ****\n",
+    "TASK [copy a file] ****\n",
+    "+++ after: /tmp/file.txt (content)\n",
+    "changed: [host1.localhost]\n",
+    "ok: [host2.localhost]\n",
+    "TASK [second] ****\n",
+    "+output\n",
+    "changed: [host1.localhost]\n",
+]
+
+SECOND_RUN = [
+    "changed: [host2.localhost]\n",
+    "TASK [third] ****\n",
+    "fatal: [host2.localhost]: FAILED! => {}\n",
+    "TASK [fourth] ****\n",
+]
+
+
+def test_process_incremental(tmp_path):
+    log_file = tmp_path / "run.log"
+    checkpoint_file = tmp_path / "run.checkpoint"
+
+    # the partial last line is left for the next run
+    log_file.write_text("".join(FIRST_RUN) + "changed: [host2")
+    first = io.StringIO()
+    AnsibleLess(output_to=first).process_incremental(str(log_file), checkpoint_file)
+    state = json.loads(checkpoint_file.read_text())
+    assert state["offset"] == len("".join(FIRST_RUN))
+    assert state["last_section"] == "TASK"
+    assert state["hosts"] == ["host1.localhost", "host2.localhost"]
+
+    log_file.write_text("".join(FIRST_RUN + SECOND_RUN))
+    second = io.StringIO()
+    with open(log_file) as input_file:
+        AnsibleLess(output_to=second).process_incremental(input_file, checkpoint_file)
+
+    expected = io.StringIO()
+    AnsibleLess(output_to=expected).process(FIRST_RUN + SECOND_RUN)
+
+    assert "copy a file" in first.getvalue()
+    assert "second" not in first.getvalue()
+    assert "copy a file" not in second.getvalue()
+    assert first.getvalue() + second.getvalue() == expected.getvalue()
+
+
+def test_process_incremental_restarts(tmp_path):
+    log_file = tmp_path / "run.log"
+    checkpoint_file = tmp_path / "run.checkpoint"
+
+    log_file.write_text("".join(FIRST_RUN + SECOND_RUN))
+    AnsibleLess(output_to=io.StringIO()).process_incremental(str(log_file), checkpoint_file)
+
+    # a rotated log starts over from the beginning
+    log_file.write_text("".join(FIRST_RUN[:1] + FIRST_RUN[5:] + ["TASK [x]\n"]))
+    results = io.StringIO()
+    AnsibleLess(output_to=results).process_incremental(str(log_file), checkpoint_file)
+    assert "second" in results.getvalue()
+
+
+def test_process_incremental_compressed(tmp_path):
+    import gzip
+
+    log_file = tmp_path / "run.log.gz"
+    checkpoint_file = tmp_path / "run.checkpoint"
+    log_file.write_bytes(gzip.compress("".join(FIRST_RUN + SECOND_RUN).encode()))
+
+    results = io.StringIO()
+    AnsibleLess(output_to=results).process_incremental(str(log_file), checkpoint_file)
+
+    expected = io.StringIO()
+    AnsibleLess(output_to=expected).process(FIRST_RUN + SECOND_RUN)
+    assert results.getvalue() == expected.getvalue()
+    assert not checkpoint_file.exists()
+
+
+def test_process_incremental_needs_a_file(tmp_path):
+    with pytest.raises(ValueError, match="only log files"):
+        AnsibleLess().process_incremental(io.StringIO(""), tmp_path / "checkpoint")
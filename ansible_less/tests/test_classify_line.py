@@ -0,0 +1,39 @@
+from ansible_less import (
+    AnsibleLess,
+    classify_line,
+    KIND_BLANK,
+    KIND_DATE,
+    KIND_DIFF,
+    KIND_IGNORING,
+    KIND_STATUS,
+    KIND_TEXT,
+)
+
+
+def test_classify_line():
+    prefix = "2025-12-17 15:41:09,848 p=1298946 u=hardaker n=ansible | "
+
+    record = classify_line(prefix + "changed: [host1.localhost] => (item=server)\n")
+    assert record.kind == KIND_STATUS
+    assert record.status == "changed"
+    assert record.host == "host1.localhost"
+    assert record.suffix == "=> (item=server)"
+    assert record.text == "changed: [host1.localhost] => (item=server)\n"
+
+    record = classify_line(
+        prefix + "Wednesday 17 December 2025  15:41:09 +0000 (0:00:02.805)\n"
+    )
+    assert record.kind == KIND_DATE
+
+    assert classify_line("\n").kind == KIND_BLANK
+    assert classify_line("****\n").kind == KIND_BLANK
+    assert classify_line("...ignoring\n").kind == KIND_IGNORING
+    assert classify_line("+++ after: /tmp/file.txt\n").kind == KIND_DIFF
+    assert classify_line("some stdout\n").kind == KIND_TEXT
+
+
+def test_classified_lines_are_reused():
+    al = AnsibleLess()
+    records = al.classify_lines(["ok: [host1]\n", "changed: [host2]\n"])
+    assert al.classify_lines(records) == records
+    assert al.check_important(records)
@@ -0,0 +1,92 @@
+import io
+
+from ansible_less import AnsibleLess
+from ansible_less.compare import LogComparison, fingerprint_log
+
+OLD_LOG = [
+    "PLAY [all] ****\n",
+    "TASK [run a command] ****\n",
+    'ok: [web1] => {"delta": "0:00:01.123456", "rc": 0}\n',
+    "TASK [copy a file] ****\n",
+    "+++ after: /tmp/file.txt (content)\n",
+    "changed: [web1]\n",
+    "ok: [web2]\n",
+    "ok: [db1]\n",
+    "TASK [restart web] ****\n",
+    "fatal: [web1]: FAILED! => {}\n",
+    "changed: [web2]\n",
+    "TASK [old only] ****\n",
+    "changed: [db1]\n",
+    "PLAY RECAP ****\n",
+]
+
+NEW_LOG = [
+    "PLAY [all] ****\n",
+    "TASK [run a command] ****\n",
+    'ok: [web1] => {"delta": "0:00:01.987654", "rc": 0}\n',
+    "TASK [copy a file] ****\n",
+    "+++ after: /tmp/file.txt (content)\n",
+    "changed: [web1]\n",
+    "+++ after: /tmp/other.txt (content)\n",
+    "changed: [web2]\n",
+    "TASK [restart web] ****\n",
+    "changed: [web1]\n",
+    "changed: [web2]\n",
+    "TASK [new only] ****\n",
+    "ok: [web1]\n",
+    "PLAY RECAP ****\n",
+]
+
+
+def test_fingerprint_log():
+    fingerprints = fingerprint_log(AnsibleLess(), OLD_LOG)
+    assert list(fingerprints) == [
+        ("TASK [run a command]", 0),
+        ("TASK [copy a file]", 0),
+        ("TASK [restart web]", 0),
+        ("TASK [old only]", 0),
+    ]
+    hosts = fingerprints[("TASK [copy a file]", 0)]["hosts"]
+    assert hosts["web1"][0] == "changed"
+    assert hosts["web2"] == hosts["db1"]
+
+
+def test_compare_shows_only_differences():
+    output = io.StringIO()
+    LogComparison(AnsibleLess(output_to=output)).compare(OLD_LOG, NEW_LOG)
+    assert output.getvalue() == (
+        # (sub-second delta changes aren't differences)
+        "==== TASK [copy a file]\n"
+        ": changed: web2 (was ok):\n"
+        "+++ after: /tmp/other.txt (content)\n"
+        ": missing: db1 (was ok)\n"
+        "\n"
+        "==== TASK [restart web]\n"
+        ": changed: web1 (was fatal):\n"
+        "\n"
+        "==== TASK [new only] (only in the new log)\n"
+        ": ok: web1:\n"
+        "\n"
+        "==== TASK [old only] (only in the old log)\n"
+        ": missing: db1 (was changed)\n"
+        "\n"
+    )
+
+
+def test_compare_identical_logs():
+    output = io.StringIO()
+    LogComparison(AnsibleLess(output_to=output)).compare(OLD_LOG, list(OLD_LOG))
+    assert output.getvalue() == ""
+
+
+def test_compare_aborted_log():
+    # a run cut short ends with its last task rather than a PLAY RECAP
+    aborted_log = OLD_LOG[: OLD_LOG.index("PLAY RECAP ****\n")]
+    assert list(fingerprint_log(AnsibleLess(), aborted_log))[-1] == (
+        "TASK [old only]",
+        0,
+    )
+
+    output = io.StringIO()
+    LogComparison(AnsibleLess(output_to=output)).compare(OLD_LOG, aborted_log)
+    assert output.getvalue() == ""
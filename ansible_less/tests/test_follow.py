@@ -0,0 +1,115 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import threading
+import time
+
+import pytest
+
+from ansible_less import AnsibleLess
+
+TASK_LINES = [
+    "TASK [first task] ****\n",
+    "changed: [host1.localhost]\n",
+    "changed: [host2.localhost]\n",
+]
+
+
+def test_follow_pipe():
+    lines = [*TASK_LINES, "TASK [second task] ****\n"]
+
+    (reader, writer) = os.pipe()
+    with os.fdopen(writer, "w") as output:
+        output.writelines(lines)
+
+    expected = io.StringIO()
+    AnsibleLess(output_to=expected).process(lines)
+
+    results = io.StringIO()
+    with os.fdopen(reader) as input_file:
+        AnsibleLess(output_to=results).follow(input_file, poll_interval=0.01)
+
+    assert results.getvalue() == expected.getvalue()
+    assert "first task" in results.getvalue()
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, bz2.compress, lzma.compress])
+def test_follow_compressed_pipe(compress):
+    lines = [*TASK_LINES, "TASK [second task] ****\n"]
+    # (two concatenated streams, like an appended-to compressed log)
+    data = compress("".join(lines[:2]).encode()) + compress("".join(lines[2:]).encode())
+
+    (reader, writer) = os.pipe()
+
+    def feed():
+        with os.fdopen(writer, "wb") as output:
+            for start in range(0, len(data), 7):
+                output.write(data[start : start + 7])
+                output.flush()
+
+    feeder = threading.Thread(target=feed)
+    feeder.start()
+    results = io.StringIO()
+    with os.fdopen(reader) as input_file:
+        AnsibleLess(output_to=results).follow(input_file, poll_interval=0.01)
+    feeder.join()
+
+    expected = io.StringIO()
+    AnsibleLess(output_to=expected).process(lines)
+    assert results.getvalue() == expected.getvalue()
+    assert "first task" in results.getvalue()
+
+
+def test_follow_idle_flush():
+    (reader, writer) = os.pipe()
+    results = io.StringIO()
+    flushed = threading.Event()
+
+    def feed():
+        with os.fdopen(writer, "w") as output:
+            output.writelines(TASK_LINES)
+            output.flush()
+            # the task should print without waiting for the next section
+            for _ in range(200):
+                if "first task" in results.getvalue():
+                    flushed.set()
+                    break
+                time.sleep(0.01)
+
+    feeder = threading.Thread(target=feed)
+    feeder.start()
+    with os.fdopen(reader) as input_file:
+        AnsibleLess(output_to=results).follow(
+            input_file, idle_timeout=0.05, poll_interval=0.01
+        )
+    feeder.join()
+
+    assert flushed.is_set()
+    assert results.getvalue().count("first task") == 1
+
+
+def test_flushed_section_does_not_set_hosts():
+    results = io.StringIO()
+    al = AnsibleLess(output_to=results)
+    for line in ["TASK [slow] ****\n", "changed: [h1]\n", "changed: [h2]\n"]:
+        al.process_line(line)
+    al.flush_section()
+    assert al.hosts == []
+
+    for line in [
+        "ok: [h3]\n",
+        "ok: [h4]\n",
+        "TASK [second] ****\n",
+        "changed: [h1]\n",
+        "changed: [h2]\n",
+        "ok: [h3]\n",
+        "ok: [h4]\n",
+        "PLAY RECAP ****\n",
+    ]:
+        al.process_line(line)
+
+    assert al.hosts == ["h1", "h2", "h3", "h4"]
+    assert "all hosts" not in results.getvalue()
+    assert results.getvalue().count(": changed: h1:") == 2
@@ -0,0 +1,96 @@
+import io
+
+from ansible_less import AnsibleLess
+from ansible_less.index import SectionIndex
+
+LOG_LINES = [
+    "PLAY [all] ****\n",
+    "TASK [Gathering Facts] ****\n",
+    "ok: [host1.localhost]\n",
+    "ok: [host2.localhost]\n",
+    "TASK [copy a file] ****\n",
+    "+++ after: /tmp/file.txt (content)\n",
+    "changed: [host1.localhost]\n",
+    "ok: [host2.localhost]\n",
+    "TASK [output only] ****\n",
+    "some output\n",
+    "ok: [host1.localhost]\n",
+    "[WARNING]: something odd happened\n",
+    "TASK [failing] ****\n",
+    "fatal: [host2.localhost]: FAILED! => {}\n",
+    "PLAY RECAP ****\n",
+    "host1.localhost : ok=3 changed=1\n",
+]
+
+
+def test_index(tmp_path):
+    log_file = tmp_path / "run.log"
+    log_file.write_text("".join(LOG_LINES))
+    index_file = tmp_path / "run.log.idx"
+
+    index = SectionIndex.load_or_build(log_file, index_file)
+    assert index_file.exists()
+    assert [section["section"] for section in index.sections] == [
+        "HEADER",
+        "TASK",
+        "TASK",
+        "TASK",
+        "[WARNING]:",
+        "TASK",
+        "PLAY RECAP",
+    ]
+    assert index.sections[2]["name"] == "TASK [copy a file]"
+    assert index.sections[2]["counts"] == {"changed": 1, "ok": 1}
+    assert index.all_hosts == ["host1.localhost", "host2.localhost"]
+
+    # rendering from the index matches a full pass
+    expected = io.StringIO()
+    AnsibleLess(output_to=expected).process(LOG_LINES)
+    results = io.StringIO()
+    with open(log_file) as input_file:
+        AnsibleLess(output_to=results).process_indexed(input_file, index)
+    assert results.getvalue() == expected.getvalue()
+
+    # the saved index is reused until the log changes
+    assert SectionIndex.load(index_file).sections == index.sections
+    with open(log_file, "a") as output:
+        output.write("TASK [more] ****\n")
+    assert not SectionIndex.load(index_file).matches(log_file)
+    assert len(SectionIndex.load_or_build(log_file, index_file).sections) == 8
+
+
+def test_index_select(tmp_path):
+    log_file = tmp_path / "run.log"
+    log_file.write_text("".join(LOG_LINES))
+    index = SectionIndex.build(log_file)
+
+    assert [section["name"] for section in index.select(task="copy")] == [
+        "TASK [copy a file]"
+    ]
+    assert [section["name"] for section in index.select(host="host2.localhost")] == [
+        "TASK [failing]"
+    ]
+    assert index.select(host="unknown") == []
+
+
+def test_index_unindexable(tmp_path):
+    import gzip
+
+    empty_file = tmp_path / "empty.log"
+    empty_file.write_text("")
+    assert SectionIndex.load_or_build(empty_file) is None
+
+    compressed_file = tmp_path / "run.log.gz"
+    compressed_file.write_bytes(gzip.compress("".join(LOG_LINES).encode()))
+    assert SectionIndex.load_or_build(compressed_file) is None
+    assert not (tmp_path / "run.log.gz.alidx").exists()
+
+
+def test_index_unsaveable(tmp_path, caplog):
+    log_file = tmp_path / "run.log"
+    log_file.write_text("".join(LOG_LINES))
+    index_file = tmp_path / "missing" / "run.log.alidx"
+
+    index = SectionIndex.load_or_build(log_file, index_file)
+    assert len(index.sections) == 7
+    assert "not saving the index" in caplog.text
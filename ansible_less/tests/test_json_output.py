@@ -0,0 +1,71 @@
+import io
+import json
+
+from ansible_less.json_output import AnsibleLessJSON
+
+LOG = """PLAY [all] ****
+TASK [copy files] ****
+--- before
++++ after
+changed: [host1.localhost]
+--- before
++++ after
+changed: [host2.localhost]
+ok: [host3.localhost]
+[WARNING]: something odd happened
+TASK [boring task] ****
+ok: [host1.localhost]
+ok: [host2.localhost]
+ok: [host3.localhost]
+[WARNING]: another odd thing
+PLAY RECAP ****
+host1.localhost : ok=2 changed=1
+"""
+
+
+def test_json_records():
+    output = io.StringIO()
+    al = AnsibleLessJSON(output_to=output)
+    al.process(io.StringIO(LOG))
+
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert len(records) == 2
+
+    task = records[0]
+    assert task["type"] == "task"
+    assert task["task"].startswith("TASK [copy files]")
+    assert task["statuses"] == {
+        "changed": ["host1.localhost", "host2.localhost"],
+        "ok": ["host3.localhost"],
+    }
+    assert task["outputs"][0]["hosts"] == ["host1.localhost", "host2.localhost"]
+    assert task["outputs"][0]["lines"] == ["--- before", "+++ after"]
+    assert task["warnings"] == ["[WARNING]: something odd happened"]
+
+    # warnings after a boring task get a record of their own
+    assert records[1]["type"] == "warning"
+    assert records[1]["task"].startswith("TASK [boring task]")
+    assert records[1]["warnings"] == ["[WARNING]: another odd thing"]
+
+
+def test_json_records_while_following():
+    output = io.StringIO()
+    al = AnsibleLessJSON(output_to=output)
+
+    def records():
+        return [json.loads(line) for line in output.getvalue().splitlines()]
+
+    for line in ["TASK [first] ****\n", "+new\n", "changed: [host1]\n"]:
+        al.process_line(line)
+    al.process_line("[WARNING]: odd\n")
+    assert records() == []
+
+    # once a task follows, the first task can't get more warnings
+    al.process_line("TASK [second] ****\n")
+    assert [record["task"] for record in records()] == ["TASK [first]"]
+    assert records()[0]["warnings"] == ["[WARNING]: odd"]
+
+    # and an idle flush emits an in-progress task
+    al.process_line("changed: [host2]\n")
+    al.flush_section()
+    assert [record["task"] for record in records()] == ["TASK [first]", "TASK [second]"]
@@ -0,0 +1,60 @@
+import io
+
+from ansible_less import AnsibleLess, find_last_runs
+
+
+def make_run(number, prefix=""):
+    return [
+        f"{prefix}PLAY [all] ****\n",
+        f"{prefix}TASK [run {number}] ****\n",
+        f"{prefix}changed: [host1.localhost]\n",
+        f"{prefix}PLAY RECAP ****\n",
+        f"{prefix}host1.localhost : ok=1 changed=1\n",
+        "\n",
+    ]
+
+
+def test_find_last_runs():
+    runs = [make_run(number) for number in range(3)]
+    data = "".join(line for run in runs for line in run).encode()
+    run_length = len("".join(runs[0]).encode())
+
+    assert find_last_runs(data, 1) == 2 * run_length
+    assert find_last_runs(data, 2) == run_length
+    assert find_last_runs(data, 3) == 0
+    assert find_last_runs(data, 10) == 0
+
+    # an unfinished run at the end counts as a run
+    unfinished = data + b"PLAY [all] ****\nTASK [still running] ****\n"
+    assert find_last_runs(unfinished, 1) == len(data)
+    assert find_last_runs(unfinished, 2) == 2 * run_length
+
+    # log_path prefixes, and PLAY text that doesn't start a line
+    prefix = "2025-12-17 15:41:09,848 p=1 u=root n=ansible | "
+    lines = make_run(0, prefix) + ["ok: [h] => PLAY [x] and PLAY RECAP\n"]
+    lines += make_run(1, prefix)
+    data = "".join(lines).encode()
+    assert data[find_last_runs(data, 1) :].startswith(prefix.encode() + b"PLAY [")
+    assert b"run 0" not in data[find_last_runs(data, 1) :]
+
+
+def test_process_last_runs(tmp_path):
+    log_file = tmp_path / "run.log"
+    log_file.write_text("".join(make_run(1) + make_run(2) + make_run(3)))
+
+    output = io.StringIO()
+    with open(log_file) as input_file:
+        AnsibleLess(output_to=output).process_last_runs(input_file, 2)
+    results = output.getvalue()
+
+    assert "run 1" not in results
+    assert "run 2" in results
+    assert "run 3" in results
+
+
+def test_process_last_runs_falls_back():
+    output = io.StringIO()
+    AnsibleLess(output_to=output).process_last_runs(
+        io.StringIO("".join(make_run(1) + make_run(2))), 1
+    )
+    assert "run 1" in output.getvalue()
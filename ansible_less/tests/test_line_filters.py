@@ -1,4 +1,6 @@
-from ansible_less import AnsibleLess
+import copy
+
+from ansible_less import AnsibleLess, boring_regex, default_config
 
 
 def test_test():
@@ -38,3 +40,57 @@ def test_test():
     # clean up tmpfilenames
     results = al.filter_lines(['+++ after: /home/user/.ansible/tmp/ansible-local-3524983q2d7vqwe/tmplxfgjne5/somefile.txt'])
     assert results == ['+++ after: /home/user/.ansible/tmp/.../somefile.txt']
+
+
+def test_filter_trailing_blanks():
+    al = AnsibleLess()
+
+    # inner blank lines are kept, trailing ones are dropped
+    results = al.filter_lines(["a\n", "\n", "b\n", "\n", "  \n"])
+    assert results == ["a\n", "\n", "b\n"]
+
+    # the generator pipeline is lazy and accepts any iterable
+    results = al.iter_filtered_lines(iter(["skipping: [host1]\n", "c\n"]))
+    assert next(results) == "c\n"
+
+
+def test_filter_large_section():
+    al = AnsibleLess()
+
+    lines = []
+    for n in range(20000):
+        lines.append("Tuesday 24 June 2025  22:45:56 +0000 (0:00:10.717)\n")
+        lines.append(f"output line {n}\n")
+    results = al.filter_lines(lines)
+    assert len(results) == 20000
+    assert results[-1] == "output line 19999\n"
+
+
+def test_boring_patterns():
+    regex = boring_regex(["ok:", "[WARNING]:"], [r"restarted \d+ services"])
+    assert regex.search("ok: [host1]")
+    assert regex.search("[WARNING]: odd")
+    assert regex.search("restarted 12 services")
+    assert not regex.search("restarted some services")
+    assert not boring_regex([]).search("anything")
+
+    # global flags only apply to their own pattern
+    regex = boring_regex(["ok:"], ["(?i)noisy", "(?x) quiet \\d  # a comment", "loud"])
+    assert regex.search("NOISY line")
+    assert regex.search("quiet1")
+    assert not regex.search("LOUD")
+
+    al = AnsibleLess()
+    lines = ["TASK [restart] ****\n", "restarted 3 services\n", "ok: [host1]\n"]
+    assert al.check_important(lines)
+
+    config = copy.deepcopy(default_config)
+    config["display"]["boring_patterns"] = [r"restarted \d+ services", "noisy"]
+    al = AnsibleLess(config=config)
+    assert not al.check_important(lines)
+    warnings = ["[WARNING]: noisy thing\n", "[WARNING]: bad\n"]
+    assert list(al.iter_warnings(warnings)) == ["[WARNING]: bad"]
+
+    # assigning new boring words rebuilds the regexes
+    al.boring_line_pieces = [*al.boring_line_pieces, "bad"]
+    assert list(al.iter_warnings(["[WARNING]: bad\n"])) == []
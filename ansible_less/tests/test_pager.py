@@ -0,0 +1,85 @@
+import io
+import sys
+import time
+
+from ansible_less import AnsibleLess
+from ansible_less.pager import pager_command, pager_output
+
+LOG_LINES = [
+    "TASK [restart] ****\n",
+    "changed: [host1]\n",
+    "ok: [host2]\n",
+    "PLAY RECAP ****\n",
+]
+
+
+def test_pager_command(monkeypatch):
+    monkeypatch.setenv("PAGER", "less -R")
+    assert pager_command() == ["less", "-R"]
+    monkeypatch.delenv("PAGER")
+    assert pager_command() == ["less"]
+
+
+def test_pager_gets_output(tmp_path):
+    paged = tmp_path / "paged.txt"
+    copy = f"import sys; open({str(paged)!r}, 'w').write(sys.stdin.read())"
+    with pager_output([sys.executable, "-c", copy]) as output_to:
+        AnsibleLess(output_to=output_to).process(LOG_LINES)
+
+    expected = io.StringIO()
+    AnsibleLess(output_to=expected).process(LOG_LINES)
+    assert paged.read_text() == expected.getvalue()
+
+
+def test_pager_quit_early_stops_writing():
+    writes = 0
+    with pager_output([sys.executable, "-c", "import sys; sys.stdin.read(10)"]) as output_to:
+        for writes in range(1000000):  # noqa: B007
+            output_to.write("x" * 100 + "\n")
+    assert writes < 1000000 - 1
+
+
+def test_missing_pager_uses_stdout():
+    with pager_output(["/nonexistent/pager"]) as output_to:
+        assert output_to is sys.stdout
+
+
+def test_pager_gets_sections_while_reading(tmp_path):
+    from argparse import Namespace
+
+    from ansible_less.tools.ansible_less_cli import process
+
+    paged = tmp_path / "paged.txt"
+    first_line = (
+        f"import sys; open({str(paged)!r}, 'w').write(sys.stdin.readline());"
+        " sys.stdin.read()"
+    )
+    seen_before_end = []
+
+    def slow_log():
+        # the first task prints once the second one starts
+        yield from LOG_LINES[:3]
+        yield "TASK [second] ****\n"
+        for _ in range(500):
+            if paged.exists() and paged.stat().st_size:
+                break
+            time.sleep(0.01)
+        seen_before_end.append(paged.exists() and paged.read_text())
+        yield "changed: [host1]\n"
+
+    args = Namespace(
+        compare=False,
+        input_files=["-"],
+        input_file=slow_log(),
+        last_runs=None,
+        timings=False,
+        checkpoint=None,
+        index=False,
+        jobs=1,
+        json=False,
+        mmap=False,
+    )
+    with pager_output([sys.executable, "-c", first_line]) as output_to:
+        process(AnsibleLess(output_to=output_to), args, streaming=True)
+
+    assert seen_before_end == ["==== TASK [restart]\n"]
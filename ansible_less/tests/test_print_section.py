@@ -0,0 +1,122 @@
+import io
+
+from ansible_less import AnsibleLess
+
+
+def test_identical_outputs_collapse():
+    output = io.StringIO()
+    al = AnsibleLess(output_to=output)
+    al.print_section(
+        [
+            "TASK [copy files] ****\n",
+            "+output A\n",
+            "changed: [host1.localhost]\n",
+            "+output B\n",
+            "changed: [host2.localhost]\n",
+            "+output A\n",
+            "changed: [host3.localhost]\n",
+            "+output C\n",
+            "fatal: [host4.localhost]\n",
+        ]
+    )
+    results = output.getvalue()
+
+    # identical outputs print once, no matter where the hosts appear
+    assert results.count("+output A") == 1
+    assert results.count("+output B") == 1
+
+    # the worst status comes first, then the biggest cluster
+    assert results.index("host4") < results.index("host1")
+    assert results.index("host1") < results.index("host3") < results.index("host2")
+    assert results.index("host3") < results.index("+output A")
+
+
+def test_cluster_hosts():
+    al = AnsibleLess()
+    groupings = {
+        "host1": {"status": "changed", "lines": ["a\n"]},
+        "host2": {"status": "ok", "lines": ["b\n"]},
+        "host3": {"status": "changed", "lines": ["a\n"]},
+        "host4": {"status": "changed", "lines": ["a", "\n"]},
+    }
+    assert al.cluster_hosts(groupings) == [["host1", "host3"], ["host4"], ["host2"]]
+
+
+def test_host_ids_and_bits():
+    al = AnsibleLess()
+    al.hosts = ["host1", "host2", "host3"]
+    assert al.host_id("host2") == 1
+    assert al.host_id("host9") == 3
+    assert al.host_names == ["host1", "host2", "host3", "host9"]
+    assert al.all_hosts_bits == 0b111
+    assert al.host_bits([0, 3]) == 0b1001
+
+    groupings = {
+        "host3": {"status": "ok", "lines": []},
+        "host1": {"status": "changed", "lines": []},
+        "host9": {"status": "ok", "lines": []},
+    }
+    assert al.status_host_ids(groupings) == {"ok": [2, 3], "changed": [0]}
+
+
+def test_all_hosts_needs_the_same_hosts():
+    output = io.StringIO()
+    al = AnsibleLess(output_to=output)
+    al.hosts = ["host1", "host2", "host3"]
+    al.print_section(
+        [
+            "TASK [something] ****\n",
+            "ok: [host1]\n",
+            "ok: [host2]\n",
+            "ok: [host4]\n",
+            "changed: [host3]\n",
+        ]
+    )
+    results = output.getvalue()
+
+    # as many ok hosts as there are hosts isn't enough for "all hosts"
+    assert ": ok: 3 hosts" in results
+    assert "all hosts" not in results
+
+    output.truncate(0)
+    al.print_section(
+        [
+            "TASK [something] ****\n",
+            "changed: [host1]\n",
+            "changed: [host2]\n",
+            "changed: [host3]\n",
+        ]
+    )
+    assert ": changed: all hosts" in output.getvalue()
+
+
+def test_older_configuration():
+    # a configuration from before the filters, limits and newer settings
+    config = {
+        "display": {
+            "status_prefix": ":",
+            "all_sections": False,
+            "show_header": False,
+            "show_trailer": False,
+            "dont_strip_prefixes": False,
+        },
+        "groupings": {
+            "dont_use_groupings": False,
+            "dont_group_oks": False,
+            "dont_group_skipped": False,
+        },
+    }
+    output = io.StringIO()
+    al = AnsibleLess(config=config, output_to=output)
+    assert al.query is None
+    assert al.truncated_lines == 100
+    al.process(
+        [
+            "TASK [copy] ****\n",
+            "+new\n",
+            "changed: [host1]\n",
+            "ok: [host2]\n",
+            "PLAY RECAP ****\n",
+        ]
+    )
+    assert ": changed: host1:\n+new\n" in output.getvalue()
@@ -0,0 +1,102 @@
+import copy
+import io
+
+from ansible_less import AnsibleLess, default_config
+
+FIRST_LOG = [
+    "PLAY [all] ****\n",
+    "TASK [copy a file] ****\n",
+    "--- before: /tmp/file.txt (content)\n",
+    "+++ after: /tmp/file.txt (content)\n",
+    "changed: [host1.dc1]\n",
+    "ok: [host2.dc1]\n",
+    "[WARNING]: something odd happened\n",
+    "TASK [restart] ****\n",
+    "changed: [host1.dc1]\n",
+    "changed: [host2.dc1]\n",
+    "PLAY RECAP ****\n",
+    "host1.dc1 : ok=2 changed=2\n",
+]
+
+SECOND_LOG = [
+    "PLAY [all] ****\n",
+    "TASK [copy a file] ****\n",
+    "--- before: /tmp/file.txt (content)\n",
+    "+++ after: /tmp/file.txt (content)\n",
+    "changed: [host1.dc2]\n",
+    "ok: [host2.dc2]\n",
+    "[WARNING]: something odd happened\n",
+    "TASK [only in dc2] ****\n",
+    "fatal: [host2.dc2]: FAILED! => {}\n",
+    "TASK [restart] ****\n",
+    "changed: [host1.dc2]\n",
+    "changed: [host2.dc2]\n",
+    "PLAY RECAP ****\n",
+    "host1.dc2 : ok=2 changed=2\n",
+]
+
+
+def run(tmp_path, jobs=1):
+    input_files = []
+    for n, lines in enumerate([FIRST_LOG, SECOND_LOG]):
+        log_file = tmp_path / f"run{n}.log"
+        log_file.write_text("".join(lines))
+        input_files.append(str(log_file))
+
+    output = io.StringIO()
+    AnsibleLess(output_to=output).process_logs(input_files, jobs=jobs)
+    return output.getvalue()
+
+
+def test_process_logs_merges_tasks(tmp_path):
+    results = run(tmp_path)
+
+    # each task is shown once, with the hosts of both logs clustered
+    assert results.count("==== TASK [copy a file]") == 1
+    assert results.count("+++ after") == 1
+    assert ": changed: host1.dc1:\n: changed: host1.dc2:\n" in results
+    assert ": ok: 2 hosts" in results
+    assert results.count("something odd happened") == 1
+
+    # the host list spans every log
+    assert ": changed: all hosts" in results
+
+    # a task found in only one log stays where it was in that log
+    assert (
+        results.index("copy a file")
+        < results.index("only in dc2")
+        < results.index("TASK [restart]")
+    )
+
+
+def test_process_logs_with_processes(tmp_path):
+    assert run(tmp_path, jobs=2) == run(tmp_path)
+
+
+def test_process_logs_with_open_files_in_config(tmp_path):
+    input_files = []
+    for n, lines in enumerate([FIRST_LOG, SECOND_LOG]):
+        log_file = tmp_path / f"run{n}.log"
+        log_file.write_text("".join(lines))
+        input_files.append(str(log_file))
+
+    # like the command line's configuration with -o
+    with open(tmp_path / "out.txt", "w") as output_to:
+        config = copy.deepcopy(default_config)
+        config["output"] = {"output_to": output_to}
+        AnsibleLess(config=config, output_to=output_to).process_logs(
+            input_files, jobs=2
+        )
+    assert (tmp_path / "out.txt").read_text() == run(tmp_path)
+
+
+def test_summarize_log():
+    al = AnsibleLess()
+    summary = al.summarize_log(FIRST_LOG + FIRST_LOG[1:5] + ["PLAY RECAP ****\n"])
+    assert [task["key"] for task in summary["tasks"]] == [
+        ("TASK [copy a file]", 0),
+        ("TASK [restart]", 0),
+        ("TASK [copy a file]", 1),
+    ]
+    assert summary["tasks"][0]["warnings"] == ["[WARNING]: something odd happened"]
+    assert summary["hosts"] == ["host1.dc1", "host2.dc1"]
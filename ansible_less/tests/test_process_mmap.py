@@ -0,0 +1,55 @@
+import io
+
+from ansible_less import AnsibleLess
+
+LOG_LINES = [
+    "PLAY [all] ****\n",
+    "TASK [Gathering Facts] ****\n",
+    "ok: [host1.localhost]\n",
+    "ok: [host2.localhost]\n",
+    "TASK [copy a file] ****\n",
+    "Wednesday 17 December 2025  15:41:07 +0000 (0:00:16.929)       0:00:16.990 \n",
+    "--- before: /tmp/file.txt (content)\n",
+    "+++ after: /tmp/file.txt (content)\n",
+    "changed: [host1.localhost]\n",
+    "ok: [host2.localhost]\n",
+    "TASK [boring] ****\n",
+    "ok: [host1.localhost]\n",
+    "skipping: [host2.localhost]\n",
+    "[WARNING]: something odd happened\n",
+    "TASK [failing] ****\n",
+    "fatal: [host2.localhost]: FAILED! => {}\n",
+    "PLAY RECAP ****\n",
+    "host1.localhost : ok=3 changed=1\n",
+]
+
+
+def run(method, input_file):
+    output = io.StringIO()
+    al = AnsibleLess(output_to=output)
+    al.show_trailer = True
+    getattr(al, method)(input_file)
+    return output.getvalue()
+
+
+def test_process_mmap_matches_process(tmp_path):
+    log_file = tmp_path / "run.log"
+    for newline in ["\n", "\r\n"]:
+        log_file.write_bytes("".join(LOG_LINES).replace("\n", newline).encode())
+
+        with open(log_file) as input_file:
+            expected = run("process", input_file)
+        with open(log_file) as input_file:
+            results = run("process_mmap", input_file)
+
+        assert results == expected
+        assert "copy a file" in results
+        assert "failing" in results
+
+
+def test_process_mmap_falls_back(tmp_path):
+    # empty files can't be mapped
+    log_file = tmp_path / "empty.log"
+    log_file.write_text("")
+    with open(log_file) as input_file:
+        assert run("process_mmap", input_file) == ""
@@ -0,0 +1,53 @@
+import copy
+import io
+import multiprocessing
+
+from ansible_less import AnsibleLess, default_config
+
+
+def make_log(task_count: int = 40) -> list[str]:
+    lines = ["PLAY [all] ****\n"]
+    for task in range(task_count):
+        lines.append(f"TASK [task {task}] ****\n")
+        lines.append("ok: [host1.localhost]\n")
+        if task % 3 == 0:
+            lines.append(f"+changed line {task}\n")
+            lines.append("changed: [host2.localhost]\n")
+        else:
+            lines.append("ok: [host2.localhost]\n")
+    lines.append("PLAY RECAP ****\n")
+    return lines
+
+
+def test_process_parallel_matches_process():
+    lines = make_log()
+
+    expected = io.StringIO()
+    AnsibleLess(output_to=expected).process(lines)
+
+    results = io.StringIO()
+    AnsibleLess(output_to=results).process_parallel(lines, jobs=2, chunk_lines=10)
+
+    assert results.getvalue() == expected.getvalue()
+    assert "task 39" in results.getvalue()
+
+
+def test_process_parallel_spawned_with_open_files_in_config(tmp_path):
+    lines = make_log()
+    expected = io.StringIO()
+    AnsibleLess(output_to=expected).process(lines)
+
+    # spawned workers (the default on macOS) get a pickled configuration
+    start_method = multiprocessing.get_start_method()
+    multiprocessing.set_start_method("spawn", force=True)
+    try:
+        with open(tmp_path / "out.txt", "w") as output_to:
+            config = copy.deepcopy(default_config)
+            config["output"] = {"output_to": output_to}
+            AnsibleLess(config=config, output_to=output_to).process_parallel(
+                lines, jobs=2, chunk_lines=10
+            )
+    finally:
+        multiprocessing.set_start_method(start_method, force=True)
+
+    assert (tmp_path / "out.txt").read_text() == expected.getvalue()
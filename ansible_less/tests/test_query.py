@@ -0,0 +1,116 @@
+import copy
+import io
+
+from ansible_less import AnsibleLess, Query, default_config
+from ansible_less.index import SectionIndex
+
+LOG_LINES = [
+    "PLAY [all] ****\n",
+    "TASK [copy a file] ****\n",
+    "+++ after: /tmp/file.txt (content)\n",
+    "changed: [web1.localhost]\n",
+    "+++ after: /tmp/file.txt (content)\n",
+    "changed: [db1.localhost]\n",
+    "TASK [restart web] ****\n",
+    "fatal: [web1.localhost]: FAILED! => {}\n",
+    "changed: [web2.localhost]\n",
+    "...ignoring\n",
+    "ok: [db1.localhost]\n",
+    "TASK [restart db] ****\n",
+    "fatal: [db1.localhost]: FAILED! => {}\n",
+    "ok: [web1.localhost]\n",
+    "PLAY RECAP ****\n",
+    "web1.localhost : ok=3 changed=1\n",
+]
+
+
+def make_ansible_less(output, **filters):
+    config = copy.deepcopy(default_config)
+    config["filters"].update(filters)
+    return AnsibleLess(config=config, output_to=output)
+
+
+def test_query_matching():
+    query = Query(tasks=["restart"], hosts=["web*"], statuses=["fatal"])
+    assert query.task_matches("2025-12-17 15:41:09 p=1 | TASK [restart web] ****")
+    assert not query.task_matches("TASK [copy a file] ****")
+    assert query.wants("web1.localhost", "fatal")
+    assert not query.wants("web1.localhost", "changed")
+    assert not query.wants("db1.localhost", "fatal")
+
+    # global flags only apply to their own pattern
+    flagged_query = Query(tasks=["copy", "(?i)RESTART WEB"])
+    assert flagged_query.task_matches("TASK [restart web] ****")
+    assert not flagged_query.task_matches("TASK [COPY a file] ****")
+
+    assert query.section_may_match(LOG_LINES[6:11])
+    assert not query.section_may_match(LOG_LINES[11:14])
+    data = "".join(LOG_LINES).encode()
+    assert query.bytes_may_match(data, 0, len(data))
+    assert not query.bytes_may_match(data, data.index(b"TASK [restart db]"), len(data))
+    assert query.hosts_may_match({"fatal": ["web1.localhost"]})
+    assert not query.hosts_may_match({"fatal": ["db1.localhost"]})
+
+    # a single pattern from a configuration file works too
+    assert Query(hosts="web*").host_matches("web2")
+
+
+def test_filtered_output():
+    output = io.StringIO()
+    make_ansible_less(output, hosts=["web*"], statuses=["fatal"]).process(LOG_LINES)
+    results = output.getvalue()
+    assert results == "==== TASK [restart web]\n: fatal: web1.localhost:\nFAILED! => {}\n\n"
+
+    output = io.StringIO()
+    make_ansible_less(output, tasks=["restart"], hosts=["web*"]).process(LOG_LINES)
+    results = output.getvalue()
+    assert "copy a file" not in results
+    assert "restart db" not in results
+    # the '...ignoring' line stays with its dropped host
+    assert ": changed: web2.localhost:\n...ignoring\n" in results
+    assert "db1" not in results
+
+
+def test_filtered_output_lists_hosts():
+    lines = ["TASK [copy a file] ****\n"]
+    for number in range(30):
+        if number % 10 == 0:
+            lines.append("+new content\n")
+            lines.append(f"changed: [host{number}]\n")
+        else:
+            lines.append(f"ok: [host{number}]\n")
+    lines.append("PLAY RECAP ****\n")
+
+    # only the shown hosts changed, but not all hosts did
+    output = io.StringIO()
+    make_ansible_less(output, statuses=["changed"]).process(lines)
+    assert output.getvalue() == (
+        "==== TASK [copy a file]\n"
+        ": changed: host0:\n"
+        ": changed: host10:\n"
+        ": changed: host20:\n"
+        "+new content\n"
+        "\n"
+    )
+
+
+def test_filtered_engines_match(tmp_path):
+    log_file = tmp_path / "run.log"
+    log_file.write_text("".join(LOG_LINES))
+    filters = {"hosts": ["db*"], "statuses": ["fatal", "changed"]}
+
+    expected = io.StringIO()
+    make_ansible_less(expected, **filters).process(LOG_LINES)
+    assert "restart db" in expected.getvalue()
+    assert "restart web" not in expected.getvalue()
+
+    results = io.StringIO()
+    with open(log_file) as input_file:
+        make_ansible_less(results, **filters).process_mmap(input_file)
+    assert results.getvalue() == expected.getvalue()
+
+    results = io.StringIO()
+    index = SectionIndex.build(log_file)
+    with open(log_file) as input_file:
+        make_ansible_less(results, **filters).process_indexed(input_file, index)
+    assert results.getvalue() == expected.getvalue()
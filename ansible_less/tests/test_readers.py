@@ -0,0 +1,71 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import ansible_less
+from ansible_less import AnsibleLess
+from ansible_less.readers import can_decompress, detect_compression, open_log
+
+LOG_TEXT = "".join(
+    [
+        "TASK [copy a file] ****\n",
+        "+++ after: /tmp/file.txt (content)\n",
+        "changed: [host1.localhost]\n",
+        "TASK [next] ****\n",
+    ]
+)
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, bz2.compress, lzma.compress])
+def test_compressed_input(tmp_path, compress):
+    log_file = tmp_path / "run.log.compressed"
+    log_file.write_bytes(compress(LOG_TEXT.encode()))
+
+    assert detect_compression(log_file.read_bytes()) is not None
+
+    expected = io.StringIO()
+    AnsibleLess(output_to=expected).process(LOG_TEXT.splitlines(keepends=True))
+
+    for source in [str(log_file), open(log_file), open(log_file, "rb")]:
+        results = io.StringIO()
+        AnsibleLess(output_to=results).process(source)
+        assert results.getvalue() == expected.getvalue()
+        assert "copy a file" in results.getvalue()
+
+
+def test_uncompressed_input(tmp_path):
+    log_file = tmp_path / "run.log"
+    log_file.write_text(LOG_TEXT)
+
+    assert detect_compression(log_file.read_bytes()) is None
+
+    # text streams are passed through untouched
+    with open(log_file) as input_file:
+        assert open_log(input_file) is input_file
+        assert open_log(input_file).read() == LOG_TEXT
+
+    lines = LOG_TEXT.splitlines(keepends=True)
+    assert open_log(lines) is lines
+
+
+@pytest.mark.skipif(can_decompress("zstd"), reason="zstd support is installed")
+def test_zstd_without_zstandard(tmp_path):
+    log_file = tmp_path / "run.log.zst"
+    log_file.write_bytes(b"\x28\xb5\x2f\xfd" + b"\0" * 10)
+
+    result = subprocess.run(
+        [sys.executable, "-m", "ansible_less.tools.ansible_less_cli", "-s", str(log_file)],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": str(Path(ansible_less.__file__).parent.parent)},
+    )
+    assert result.returncode == 2
+    assert "install the 'zstandard' package" in result.stderr
+    assert "Traceback" not in result.stderr
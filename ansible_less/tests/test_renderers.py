@@ -0,0 +1,83 @@
+import io
+
+from rich.console import Console
+
+from ansible_less import AnsibleLess
+from ansible_less.renderers import CapturedRenderer, PlainRenderer, RichRenderer
+
+LOG_LINES = [
+    "TASK [copy [bold]files[/bold]] ****\n",
+    "+output [red]A[/red]\n",
+    "changed: [host1.localhost]\n",
+    "ok: [host2.localhost]\n",
+    "ok: [host3.localhost]\n",
+]
+
+
+class CountingWriter(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return super().write(data)
+
+
+def test_plain_renderer_batches():
+    output = CountingWriter()
+    renderer = PlainRenderer(output, buffer_size=10)
+    renderer.print("abc")
+    assert output.getvalue() == "abc\n"
+
+    with renderer.batched():
+        renderer.print("def")
+        renderer.heading("TASK [x]")
+        assert output.writes == 2
+        renderer.block([(": ok: h:\n", "ok"), ("text\n", None)])
+        assert output.writes == 3
+        renderer.print("end")
+    assert output.writes == 4
+    assert output.getvalue() == "abc\ndef\n==== TASK [x]\n: ok: h:\ntext\n\nend\n"
+
+
+def test_plain_output():
+    output = io.StringIO()
+    AnsibleLess(output_to=output).print_section(LOG_LINES)
+    assert output.getvalue() == (
+        "==== TASK [copy [bold]files[/bold]]\n"
+        ": ok: 2 hosts\n"
+        ": changed: host1.localhost:\n"
+        "+output [red]A[/red]\n"
+        "\n"
+    )
+
+
+def test_rich_output_matches_plain():
+    plain = io.StringIO()
+    AnsibleLess(output_to=plain).print_section(LOG_LINES)
+
+    # markup-like text in the log is shown as is
+    console_output = io.StringIO()
+    console = Console(file=console_output, force_terminal=False, width=20)
+    al = AnsibleLess(output_to=console)
+    assert isinstance(al.renderer, RichRenderer)
+    al.print_section(LOG_LINES)
+    assert console_output.getvalue() == plain.getvalue()
+
+
+def test_captured_renderer():
+    al = AnsibleLess()
+    al.renderer = CapturedRenderer()
+    al.print_section(LOG_LINES)
+    calls = al.renderer.take()
+    assert [method for (method, _data) in calls] == ["heading", "block"]
+    assert al.renderer.take() == []
+
+    output = io.StringIO()
+    replayed = AnsibleLess(output_to=output)
+    replayed.print_captured(calls)
+
+    expected = io.StringIO()
+    AnsibleLess(output_to=expected).print_section(LOG_LINES)
+    assert output.getvalue() == expected.getvalue()
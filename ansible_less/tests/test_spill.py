@@ -0,0 +1,111 @@
+import io
+import pickle
+
+from ansible_less import AnsibleLess, ClassifiedLine, Query
+from ansible_less.index import SectionIndex
+from ansible_less.spill import SpilledLines, TruncatedLines
+
+
+def test_spilled_lines():
+    lines = ["TASK [big] ****\n", "one\n", "two\n", "three"]
+    spilled = SpilledLines(lines[:2])
+    spilled.extend(lines[2:])
+    assert len(spilled) == 4
+    assert spilled[0] == lines[0]
+    assert list(spilled) == lines
+    # iterating twice re-reads the file
+    assert list(spilled) == lines
+    assert pickle.loads(pickle.dumps(spilled)) == lines
+
+    upper = spilled.map(str.upper)
+    assert upper[0] == "TASK [BIG] ****\n"
+    assert list(upper) == [line.upper() for line in lines]
+
+    records = AnsibleLess().classify_lines(spilled)
+    assert isinstance(records, SpilledLines)
+    assert isinstance(records[0], ClassifiedLine)
+    assert [record.line for record in records] == lines
+
+
+def test_truncated_lines():
+    lines = TruncatedLines(2, ["a\n", "b\n", "c\n"])
+    lines.append("d\n")
+    same = TruncatedLines(2, ["a\n", "b\n"])
+    same.absorb(TruncatedLines(0, ["c\n", "d\n"]))
+    assert lines.finish()[:2] == ["a\n", "b\n"]
+    assert lines.finish()[2].startswith("... 2 more lines, digest ")
+    assert TruncatedLines(2, ["a\n"]).finish() == ["a\n"]
+
+    other = TruncatedLines(2, ["a\n", "b\n", "c\n", "e\n"])
+    assert other.finish()[2] != lines.finish()[2]
+
+
+def make_log(count):
+    lines = ["PLAY [all] ****\n", "TASK [huge] ****\n"]
+    for host in ["host1", "host2", "host3"]:
+        lines.extend(f"output {n} {host == 'host3'}\n" for n in range(count))
+        lines.append(f"changed: [{host}]\n")
+    lines.extend(["ok: [host4]\n", "PLAY RECAP ****\n"])
+    return lines
+
+
+def run(lines, section_memory=None, mmap_file=None, index=None):
+    output = io.StringIO()
+    ansible_less = AnsibleLess(output_to=output)
+    ansible_less.truncated_lines = 3
+    if section_memory:
+        ansible_less.section_memory = section_memory
+    if mmap_file:
+        with open(mmap_file) as input_file:
+            if index:
+                ansible_less.process_indexed(input_file, index)
+            else:
+                ansible_less.process_mmap(input_file)
+    else:
+        ansible_less.process(lines)
+    return output.getvalue()
+
+
+def test_oversized_sections_are_truncated(tmp_path):
+    lines = make_log(20000)
+    results = run(lines, section_memory=10000)
+    assert results.startswith(
+        "==== TASK [huge]\n"
+        ": changed: host1:\n"
+        ": changed: host2:\n"
+        "output 0 False\n"
+        "output 1 False\n"
+        "output 2 False\n"
+        "... 19997 more lines, digest "
+    )
+    assert ": changed: host3:\noutput 0 True\n" in results
+    assert results.count("more lines") == 2
+
+    # the mmap engine spills the same way
+    log_file = tmp_path / "huge.log"
+    log_file.write_text("".join(lines))
+    assert run(lines, section_memory=10000, mmap_file=log_file) == results
+
+    # as do the index engine and building its index
+    index = SectionIndex.build(log_file, section_memory=10000)
+    assert index.sections[1]["counts"] == {"changed": 3, "ok": 1}
+    assert (
+        run(lines, section_memory=10000, mmap_file=log_file, index=index) == results
+    )
+
+    # sections within the budget are unchanged
+    small = make_log(5)
+    assert run(small, section_memory=10000) == run(small)
+    assert "more lines" not in run(small)
+
+
+def test_query_spilled_section(monkeypatch):
+    monkeypatch.setattr("ansible_less.TRUNCATE_BATCH_LINES", 10)
+    lines = SpilledLines(["TASK [big] ****\n"])
+    lines.extend(f"output {n}\n" for n in range(100))
+    lines.extend(["ok: [host1]\n", "changed: [host2]\n"])
+
+    assert Query(hosts=["host2"]).section_may_match(lines)
+    assert not Query(hosts=["host1"]).section_may_match(lines)
+    assert not Query(tasks=["small"]).section_may_match(lines)
+    lines.close()
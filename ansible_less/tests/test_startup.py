@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import ansible_less
+
+# modules that plain (-s / -o) runs shouldn't need to import at all
+# (bz2 and lzma aren't listed since argparse imports them through shutil)
+SLOW_MODULES = [
+    "rich",
+    "rich.console",
+    "rich.logging",
+    "rich.text",
+    "concurrent.futures",
+    "multiprocessing",
+    "gzip",
+]
+
+
+def imported_modules(args):
+    """Run python with -X importtime, returning the imported module names."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(Path(ansible_less.__file__).parent.parent)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return {
+        line.split("|")[-1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+
+
+def test_plain_runs_import_lazily(tmp_path):
+    log_file = tmp_path / "run.log"
+    log_file.write_text("TASK [copy] ****\nchanged: [host1]\n")
+
+    modules = imported_modules(
+        ["-m", "ansible_less.tools.ansible_less_cli", "-s", str(log_file)]
+    )
+    assert "ansible_less.index" in modules
+    for module in SLOW_MODULES:
+        assert module not in modules
@@ -0,0 +1,42 @@
+import io
+import json
+
+from ansible_less import AnsibleLess
+from ansible_less.stats import Stats
+
+LOG_LINES = [
+    "PLAY [all] ****\n",
+    "TASK [boring] ****\n",
+    "ok: [host1.localhost]\n",
+    "ok: [host2.localhost]\n",
+    "TASK [copy a file] ****\n",
+    "+new line\n",
+    "changed: [host1.localhost]\n",
+    "ok: [host2.localhost]\n",
+    "TASK [unchanged output] ****\n",
+    "some output\n",
+    "ok: [host1.localhost]\n",
+    "PLAY RECAP ****\n",
+]
+
+
+def test_stats():
+    stats = Stats()
+    AnsibleLess(output_to=io.StringIO(), stats=stats).process(LOG_LINES)
+    report = stats.report()
+
+    assert report["counters"]["lines"] == len(LOG_LINES)
+    assert report["counters"]["sections_seen_TASK"] == 3
+    assert report["counters"]["sections_dropped_boring"] == 1
+    assert report["counters"]["sections_dropped_unchanged"] == 1
+    assert report["counters"]["sections_printed"] == 1
+    assert report["host_count"] == 2
+    assert report["largest_section"]["lines"] == 4
+    for phase in ["read", "split", "check_important", "group_by_hosts", "total"]:
+        assert report["timers"][phase] >= 0
+
+    # both outputs are usable
+    json.dumps(report)
+    summary = io.StringIO()
+    stats.write(summary)
+    assert "sections_printed" in summary.getvalue()
@@ -0,0 +1,87 @@
+import copy
+import io
+
+from ansible_less import AnsibleLess, default_config
+from ansible_less.templates import cluster_templates, fill_template, output_template
+
+
+def test_output_template():
+    (template, kinds, values) = output_template(
+        [
+            "+address 10.0.0.12 on web12.example.com\n",
+            "+id 0f3a9c21d4 uuid 123e4567-e89b-12d3-a456-426614174000 port 8080\n",
+            "+route fe80::1:2 at 12:34:56\n",
+        ]
+    )
+    assert template == (
+        "+address \0 on \0\n+id \0 uuid \0 port \0\n+route \0 at \0:\0:\0\n"
+    )
+    assert kinds == ("ip", "host", "hex", "uuid", "num", "ip", "num", "num", "num")
+    assert values == [
+        "10.0.0.12",
+        "web12.example.com",
+        "0f3a9c21d4",
+        "123e4567-e89b-12d3-a456-426614174000",
+        "8080",
+        "fe80::1:2",
+        "12",
+        "34",
+        "56",
+    ]
+
+    # plain words (and hex-looking ones without digits) are kept
+    assert output_template(["deadbeef copied\n"]) == ("deadbeef copied\n", (), [])
+
+
+def test_cluster_templates():
+    groupings = {
+        "host1": {"status": "changed", "lines": ["ip 10.0.0.1 port 22\n"]},
+        "host2": {"status": "changed", "lines": ["ip 10.0.0.2 port 22\n"]},
+        "host3": {"status": "changed", "lines": ["ip 10.0.0.1 port 22\n"]},
+        "host4": {"status": "changed", "lines": ["something else\n"]},
+    }
+    clusters = [["host1", "host3"], ["host2"], ["host4"]]
+    templates = cluster_templates(clusters, groupings)
+    assert templates == [
+        [(["host1", "host3"], ["10.0.0.1", "22"]), (["host2"], ["10.0.0.2", "22"])],
+        [(["host4"], [])],
+    ]
+
+    # values shared by every host stay in the text
+    assert fill_template(groupings["host1"]["lines"], templates[0]) == (
+        "ip <ip> port 22\n",
+        [0],
+    )
+
+
+def test_group_similar():
+    lines = ["TASK [template motd] ****\n"]
+    for number in range(1, 4):
+        lines += [
+            f"-welcome to web{number}.example.com\n",
+            "+welcome\n",
+            f"changed: [web{number}.example.com]\n",
+        ]
+    lines += ["fatal: [db1]: FAILED! => {}\n", "PLAY RECAP ****\n"]
+
+    config = copy.deepcopy(default_config)
+    config["groupings"]["group_similar"] = True
+    output = io.StringIO()
+    AnsibleLess(config, output_to=output).process(lines)
+
+    assert output.getvalue() == "".join(
+        [
+            "==== TASK [template motd]\n",
+            ": fatal: db1:\n",
+            "FAILED! => {}\n",
+            ": changed: web1.example.com:\n",
+            ": changed: web2.example.com:\n",
+            ": changed: web3.example.com:\n",
+            "-welcome to <host>\n",
+            "+welcome\n",
+            ": values for web1.example.com: web1.example.com\n",
+            ": values for web2.example.com: web2.example.com\n",
+            ": values for web3.example.com: web3.example.com\n",
+            "\n",
+        ]
+    )
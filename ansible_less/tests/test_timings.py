@@ -0,0 +1,74 @@
+import io
+
+from ansible_less import AnsibleLess
+from ansible_less.timings import (
+    TaskTimings,
+    format_duration,
+    parse_prefix_time,
+    parse_profile_duration,
+)
+
+
+def prefixed(time, line):
+    return f"2025-12-17 15:41:{time} p=1298946 u=hardaker n=ansible | {line}\n"
+
+
+LOG_LINES = [
+    prefixed("00,000", "PLAY [all] ****"),
+    prefixed("00,000", "TASK [Gathering Facts] ****"),
+    prefixed("00,000", "Wednesday 17 December 2025  15:41:00 +0000 (0:00:00.050)  0:00:00.050 ****"),
+    prefixed("01,000", "ok: [host1]"),
+    prefixed("01,000", "ok: [host2]"),
+    prefixed("01,000", "ok: [host3]"),
+    prefixed("01,000", "TASK [web : install packages] ****"),
+    prefixed("01,000", "Wednesday 17 December 2025  15:41:01 +0000 (0:00:01.000)  0:00:01.050 ****"),
+    prefixed("03,000", "changed: [host1]"),
+    prefixed("03,500", "changed: [host2]"),
+    prefixed("20,000", "changed: [host3]"),
+    prefixed("20,000", "TASK [web : restart] ****"),
+    prefixed("20,000", "Wednesday 17 December 2025  15:41:20 +0000 (0:00:19.000)  0:00:20.050 ****"),
+    prefixed("21,000", "changed: [host1]"),
+    prefixed("21,000", "changed: [host2]"),
+    prefixed("25,000", "changed: [host3]"),
+    prefixed("25,000", "PLAY RECAP ****"),
+    prefixed("25,000", "host1 : ok=3 changed=2"),
+    prefixed("25,000", "Wednesday 17 December 2025  15:41:25 +0000 (0:00:05.000)  0:00:25.050 ****"),
+]
+
+
+def test_parsing():
+    assert parse_profile_duration("x (0:01:02.500)  0:11:12.388 ****") == 62.5
+    assert parse_profile_duration("no duration") is None
+    assert parse_prefix_time("2025-12-17 15:41:09,250 p=1 |") - parse_prefix_time(
+        "2025-12-17 15:41:08 p=1 |"
+    ) == 1.25
+    assert parse_prefix_time("changed: [host1]") is None
+    assert format_duration(3723.5) == "1:02:03.500"
+
+
+def test_timings_report():
+    timings = TaskTimings()
+    ansible_less = AnsibleLess(output_to=io.StringIO(), timings=timings)
+    ansible_less.process(LOG_LINES)
+
+    report = timings.report()
+    assert report["tasks"] == [
+        (19.0, "TASK [web : install packages]"),
+        (5.0, "TASK [web : restart]"),
+        (1.0, "TASK [Gathering Facts]"),
+    ]
+    assert report["roles"] == [(24.0, "web", 2)]
+    # (host2 finished at the median time)
+    assert [(behind, host) for (behind, host, _totals) in report["hosts"]] == [
+        (20.5, "host3")
+    ]
+    assert report["hosts"][0][2]["worst"] == (16.5, "TASK [web : install packages]")
+
+    ansible_less.print_timings()
+    results = ansible_less.output_to.getvalue()
+    assert "==== Slowest tasks\n0:00:19.000  TASK [web : install packages]\n" in results
+    assert "==== Slowest roles\n0:00:24.000  web (2 tasks)\n" in results
+    assert (
+        "0:00:20.500  host3 (2 tasks, worst: TASK [web : install packages] +0:00:16.500)\n"
+        in results
+    )
@@ -0,0 +1,189 @@
+"""Task timing profiles from the timestamps in ansible logs."""
+
+from __future__ import annotations
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable
+import heapq
+import re
+import statistics
+
+from ansible_less import KIND_DATE, KIND_STATUS, ClassifiedLine
+
+# profile_tasks' "(0:00:04.372)  0:11:12.388" is the previous task's
+# duration followed by the total elapsed time
+PROFILE_DURATION_RE = re.compile(r"\((\d+):(\d{2}):(\d{2}(?:\.\d+)?)\)")
+
+# the "2025-12-17 15:41:09,848" timestamp that starts log_path lines
+PREFIX_TIME_RE = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?:,(\d+))?")
+
+# hosts are only compared on tasks run by at least this many of them
+MIN_OUTLIER_HOSTS = 3
+
+
+def parse_profile_duration(text: str) -> float | None:
+    """Return the seconds of a profile_tasks '(H:MM:SS.fff)' duration."""
+    match = PROFILE_DURATION_RE.search(text)
+    if not match:
+        return None
+    (hours, minutes, seconds) = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+@lru_cache(maxsize=4096)
+def parse_timestamp(timestamp: str) -> float:
+    """Parse a 'YYYY-MM-DD HH:MM:SS' timestamp (most lines repeat the last one)."""
+    return datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S").timestamp()
+
+
+def parse_prefix_time(line: str) -> float | None:
+    """Return the time of a line's log_path prefix, in seconds since the epoch."""
+    match = PREFIX_TIME_RE.match(line)
+    if not match:
+        return None
+    when = parse_timestamp(match.group(1))
+    if match.group(2):
+        when += int(match.group(2)) / 10 ** len(match.group(2))
+    return when
+
+
+def format_duration(seconds: float) -> str:
+    """Format seconds like profile_tasks does (H:MM:SS.fff)."""
+    (minutes, seconds) = divmod(seconds, 60)
+    (hours, minutes) = divmod(int(minutes), 60)
+    return f"{hours}:{minutes:02}:{seconds:06.3f}"
+
+
+class TaskTimings:
+    """Collects task durations and slow hosts from a stream of sections.
+
+    Task durations come from the timestamp lines of the profile_tasks
+    callback.  Each one, printed as a task starts, is the duration of
+    the task before it; the last task's is printed before PLAY RECAP.
+    Host durations come from the timestamps that ansible's log_path
+    adds to each line: a host's time is from its task's first line to
+    its status line.  Only per-host totals are kept once a task ends,
+    so memory doesn't grow with the log.
+    """
+
+    def __init__(self, top: int = 10):
+        """Create an empty TaskTimings."""
+        self.top = top
+        self.tasks: list[tuple[float, str]] = []
+        self.roles: dict[str, list] = {}
+        self.hosts: dict[str, dict] = {}
+
+        self.task_name: str | None = None
+        self.task_start: float | None = None
+        self.host_times: dict[str, float] = {}
+
+    def add_section(self, section_word: str, records: Iterable[ClassifiedLine]) -> None:
+        """Add the timings found in a section."""
+        records = iter(records)
+        first = next(records, None)
+        if first is None:
+            return
+
+        is_task = section_word in ["TASK", "HANDLER"]
+        if is_task:
+            self.finish_task()
+            self.task_start = parse_prefix_time(first.line)
+
+        for record in records:
+            if record.kind == KIND_DATE:
+                duration = parse_profile_duration(record.clean)
+                if duration is not None:
+                    self.add_duration(duration)
+            elif is_task and record.kind == KIND_STATUS and self.task_start:
+                when = parse_prefix_time(record.line)
+                if when is not None:
+                    self.host_times[record.host] = when - self.task_start
+
+        if is_task:
+            self.task_name = first.clean.rstrip()
+
+    def add_duration(self, duration: float) -> None:
+        """Attribute a profile_tasks duration to the task before it."""
+        # (the first timestamp line covers the time before any task)
+        if self.task_name is None:
+            return
+        self.tasks.append((duration, self.task_name))
+
+        role = self.task_name.split(" : ", 1)[0] if " : " in self.task_name else None
+        if role:
+            # (with the 'TASK [' prefix dropped from the role name)
+            role = role.split("[", 1)[-1]
+            totals = self.roles.setdefault(role, [0.0, 0])
+            totals[0] += duration
+            totals[1] += 1
+
+    def finish_task(self) -> None:
+        """Note how far behind its task's median time each host finished."""
+        host_times = self.host_times
+        if len(host_times) >= MIN_OUTLIER_HOSTS:
+            median = statistics.median(host_times.values())
+            for host, seconds in host_times.items():
+                behind = seconds - median
+                if behind <= 0:
+                    continue
+                totals = self.hosts.setdefault(
+                    host, {"behind": 0.0, "tasks": 0, "worst": (0.0, None)}
+                )
+                totals["behind"] += behind
+                totals["tasks"] += 1
+                totals["worst"] = max(totals["worst"], (behind, self.task_name))
+        self.host_times = {}
+
+    def report(self) -> dict:
+        """Return the slowest tasks, roles and hosts."""
+        self.finish_task()
+        return {
+            "tasks": heapq.nlargest(self.top, self.tasks),
+            "roles": heapq.nlargest(
+                self.top,
+                ((seconds, role, count) for role, (seconds, count) in self.roles.items()),
+            ),
+            "hosts": heapq.nlargest(
+                self.top,
+                ((totals["behind"], host, totals) for host, totals in self.hosts.items()),
+                key=lambda entry: entry[0],
+            ),
+        }
+
+    def format_report(self) -> list[tuple[str, list[str]]]:
+        """Return the report as (heading, lines) pairs, skipping empty parts."""
+        report = self.report()
+        parts = []
+        if report["tasks"]:
+            parts.append(
+                (
+                    "Slowest tasks",
+                    [
+                        f"{format_duration(seconds)}  {name}\n"
+                        for (seconds, name) in report["tasks"]
+                    ],
+                )
+            )
+        if report["roles"]:
+            parts.append(
+                (
+                    "Slowest roles",
+                    [
+                        f"{format_duration(seconds)}  {role} ({count} tasks)\n"
+                        for (seconds, role, count) in report["roles"]
+                    ],
+                )
+            )
+        if report["hosts"]:
+            parts.append(
+                (
+                    "Hosts furthest behind their tasks' median times",
+                    [
+                        f"{format_duration(behind)}  {host} ({totals['tasks']} tasks,"
+                        f" worst: {totals['worst'][1]}"
+                        f" +{format_duration(totals['worst'][0])})\n"
+                        for (behind, host, totals) in report["hosts"]
+                    ],
+                )
+            )
+        return parts
@@ -0,0 +1,141 @@
+"""Benchmarks the ansible-less parsing pipeline on generated logs."""
+
+from __future__ import annotations
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter, FileType, Namespace
+from logging import debug
+import json
+import sys
+
+# optionally use rich_argparse too
+help_handler = ArgumentDefaultsHelpFormatter
+try:
+    from rich_argparse import RichHelpFormatter
+
+    help_handler = RichHelpFormatter
+except Exception:
+    debug("install rich_argparse for prettier help")
+
+from ansible_less.benchmark import (
+    benchmark_report,
+    compare_reports,
+    generate_log,
+    run_benchmarks,
+)
+
+
+def parse_status_mix(value: str) -> dict[str, float]:
+    """Parse a status mix like 'ok=0.7,changed=0.2,skipping=0.1'."""
+    status_mix = {}
+    for item in value.split(","):
+        (status, weight) = item.split("=", maxsplit=1)
+        status_mix[status.strip()] = float(weight)
+    return status_mix
+
+
+def parse_args() -> Namespace:
+    """Parse the command line arguments."""
+    parser = ArgumentParser(formatter_class=help_handler, description=__doc__)
+
+    parser.add_argument(
+        "--hosts", type=int, default=100, help="The number of hosts in the log"
+    )
+
+    parser.add_argument(
+        "--tasks", type=int, default=200, help="The number of tasks in the log"
+    )
+
+    parser.add_argument(
+        "--status-mix",
+        type=parse_status_mix,
+        default="ok=0.7,skipping=0.15,changed=0.12,failed=0.03",
+        help="Relative frequency of each host status",
+    )
+
+    parser.add_argument(
+        "--diff-lines",
+        type=int,
+        default=10,
+        help="The number of diff lines each changed host prints",
+    )
+
+    parser.add_argument(
+        "--warning-rate",
+        type=float,
+        default=0.02,
+        help="The chance of a warning after each task",
+    )
+
+    parser.add_argument(
+        "--no-prefixes",
+        action="store_true",
+        help="Don't add 'date pid user |' prefixes to the log lines",
+    )
+
+    parser.add_argument(
+        "--seed", type=int, default=0, help="The random seed for generating the log"
+    )
+
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3, help="Report the best of this many runs"
+    )
+
+    parser.add_argument(
+        "-w",
+        "--write-log",
+        type=FileType("w"),
+        help="Also save the generated log to this file",
+    )
+
+    parser.add_argument(
+        "-o",
+        "--output-to",
+        type=FileType("w"),
+        default=sys.stdout,
+        help="Where to save the JSON results",
+    )
+
+    parser.add_argument(
+        "-c",
+        "--compare",
+        type=FileType("r"),
+        help="A previous JSON result file to compare against",
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    parameters = {
+        "hosts": args.hosts,
+        "tasks": args.tasks,
+        "status_mix": args.status_mix,
+        "diff_lines": args.diff_lines,
+        "warning_rate": args.warning_rate,
+        "prefixed": not args.no_prefixes,
+        "seed": args.seed,
+    }
+    lines = generate_log(
+        host_count=args.hosts,
+        task_count=args.tasks,
+        status_mix=args.status_mix,
+        diff_lines=args.diff_lines,
+        warning_rate=args.warning_rate,
+        prefixed=not args.no_prefixes,
+        seed=args.seed,
+    )
+    if args.write_log:
+        args.write_log.writelines(lines)
+
+    report = benchmark_report(parameters, run_benchmarks(lines, repeat=args.repeat))
+    json.dump(report, args.output_to, indent=2)
+    args.output_to.write("\n")
+
+    if args.compare:
+        for name, speedup in compare_reports(json.load(args.compare), report).items():
+            sys.stderr.write(f"{name:>16}: {speedup:.2f}x\n")
+
+
+if __name__ == "__main__":
+    main()
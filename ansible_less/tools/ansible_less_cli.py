@@ -1,35 +1,100 @@
 """Parses ansible log files and removes the boring 'it worked' bits."""
 
 from __future__ import annotations
-from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter, FileType, Namespace
+from argparse import (
+    ArgumentParser,
+    ArgumentDefaultsHelpFormatter,
+    ArgumentTypeError,
+    FileType,
+    Namespace,
+)
 from logging import debug, info, warning, error, critical
 from collections import defaultdict
+from contextlib import nullcontext
+from importlib.util import find_spec
 from argparse_with_config import ArgumentParserWithConfig
+import glob
+import json
 import logging
+import os
 import sys
 import re
-import yaml
 
-# optionally use rich
-try:
-    # from rich import print
-    import rich
-    from rich.logging import RichHandler
-    from rich.theme import Theme
-    from rich.console import Console
-except Exception:
-    debug("install rich and rich.logging for prettier results")
+# note: rich, rich_argparse and yaml are imported only when they're used,
+# since importing them takes longer than processing a small log.
 
-# optionally use rich_argparse too
-help_handler = ArgumentDefaultsHelpFormatter
-try:
-    from rich_argparse import RichHelpFormatter
+from ansible_less import STATUS_ORDER, AnsibleLess, scoped_pattern
+from ansible_less.compare import LogComparison
+from ansible_less.index import SectionIndex
+from ansible_less.json_output import AnsibleLessJSON
+from ansible_less.readers import (
+    ZSTD_MISSING,
+    DecompressorMissingError,
+    can_decompress,
+    file_compression,
+)
+from ansible_less.stats import Stats
 
-    help_handler = RichHelpFormatter
-except Exception:
-    debug("install rich_argparse for prettier help")
 
-from ansible_less import AnsibleLess
+def help_handler(*args, **kwargs):
+    """Create a help formatter, optionally using rich_argparse."""
+    try:
+        from rich_argparse import RichHelpFormatter
+
+        return RichHelpFormatter(*args, **kwargs)
+    except Exception:
+        debug("install rich_argparse for prettier help")
+        return ArgumentDefaultsHelpFormatter(*args, **kwargs)
+
+
+class LazyRichHandler(logging.Handler):
+    """A logging handler that creates a RichHandler when first needed."""
+
+    def __init__(self, level: int = logging.NOTSET):
+        """Create a LazyRichHandler."""
+        super().__init__(level)
+        self.handler = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Emit a record with a RichHandler, or to stderr without rich."""
+        if self.handler is None:
+            try:
+                from rich.console import Console
+                from rich.logging import RichHandler
+                from rich.theme import Theme
+
+                self.handler = RichHandler(
+                    rich_tracebacks=True,
+                    tracebacks_show_locals=True,
+                    console=Console(
+                        stderr=True, theme=Theme({"logging.level.success": "green"})
+                    ),
+                )
+            except Exception:
+                self.handler = logging.StreamHandler()
+            self.handler.setFormatter(self.formatter)
+        self.handler.handle(record)
+
+
+def regex(pattern: str) -> str:
+    """Check that a command line argument is a valid regex, even among others."""
+    try:
+        re.compile(scoped_pattern(pattern))
+    except re.error as exception:
+        msg = f"invalid regex '{pattern}': {exception}"
+        raise ArgumentTypeError(msg) from exception
+    return pattern
+
+
+def expand_input_files(patterns: list[str]) -> list[str]:
+    """Expand any glob patterns among the input file names."""
+    input_files = []
+    for pattern in patterns:
+        if any(character in pattern for character in "*?["):
+            input_files.extend(sorted(glob.glob(pattern)))
+        else:
+            input_files.append(pattern)
+    return input_files
 
 
 def parse_args() -> Namespace:
@@ -81,6 +146,15 @@ def parse_args() -> Namespace:
         config_path="dont_strip_prefixes",
     )
 
+    group.add_argument(
+        "-b",
+        "--boring",
+        action="append",
+        type=regex,
+        help="Also treat lines matching this regex as boring (may be repeated)",
+        config_path="boring_patterns",
+    )
+
     group = parser.add_argument_group("groupings", config_path="groupings")
 
     group.add_argument(
@@ -104,6 +178,13 @@ def parse_args() -> Namespace:
         config_path="dont_group_skipped",
     )
 
+    group.add_argument(
+        "--group-similar",
+        action="store_true",
+        help="Show outputs that differ only in IP addresses, host names, numbers or ids once, with each host's values",
+        config_path="group_similar",
+    )
+
     group = parser.add_argument_group("output", config_path="output")
 
     group.add_argument(
@@ -122,6 +203,135 @@ def parse_args() -> Namespace:
         config_path="stdout",
     )
 
+    group.add_argument(
+        "-J",
+        "--json",
+        action="store_true",
+        help="Write one JSON record per important section (JSON Lines) instead of text",
+        config_path="json",
+    )
+
+    group.add_argument(
+        "--timings",
+        action="store_true",
+        help="After the summary, report the slowest tasks, roles and hosts from profile_tasks and log_path timestamps",
+        config_path="timings",
+    )
+
+    group = parser.add_argument_group("filters", config_path="filters")
+
+    group.add_argument(
+        "--task",
+        action="append",
+        type=regex,
+        help="Only show tasks matching this regex (may be repeated)",
+        config_path="tasks",
+    )
+
+    group.add_argument(
+        "--host",
+        action="append",
+        help="Only show hosts matching this glob pattern, like 'web*' (may be repeated)",
+        config_path="hosts",
+    )
+
+    group.add_argument(
+        "--status",
+        action="append",
+        choices=list(STATUS_ORDER),
+        help="Only show hosts with this status (may be repeated)",
+        config_path="statuses",
+    )
+
+    group = parser.add_argument_group("input", config_path="input")
+
+    group.add_argument(
+        "--compare",
+        action="store_true",
+        help="Compare two logs (old then new) and show only the tasks whose host statuses or output differ",
+        config_path="compare",
+    )
+
+    group.add_argument(
+        "-f",
+        "--follow",
+        action="store_true",
+        help="Follow a growing log file (or pipe) and print each section as it completes",
+        config_path="follow",
+    )
+
+    group.add_argument(
+        "--last-runs",
+        type=int,
+        help="Only summarize the last N playbook runs of a log that runs are appended to",
+        config_path="last_runs",
+    )
+
+    group.add_argument(
+        "-m",
+        "--mmap",
+        action="store_true",
+        help="Map the input file into memory and only decode sections that may be shown",
+        config_path="mmap",
+    )
+
+    group.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Process sections (or multiple logs) with this many worker processes",
+        config_path="jobs",
+    )
+
+    group.add_argument(
+        "-i",
+        "--index",
+        action="store_true",
+        help="Use (and create if needed) a sidecar index of the input file's sections to skip boring ones without reading them",
+        config_path="index",
+    )
+
+    group.add_argument(
+        "--index-file",
+        type=str,
+        help="Where to keep the section index (default: the input file name plus .alidx)",
+        config_path="index_file",
+    )
+
+    group.add_argument(
+        "--checkpoint",
+        type=str,
+        help="Resume from (and save) parser state in this file, so only newly appended log lines are processed",
+        config_path="checkpoint",
+    )
+
+    group.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=2.0,
+        help="In follow mode, print an in-progress section after this many idle seconds",
+        config_path="idle_timeout",
+    )
+
+    group = parser.add_argument_group("limits", config_path="limits")
+
+    group.add_argument(
+        "--section-memory",
+        type=float,
+        default=64,
+        help="Spill sections bigger than this many MB to a temporary file and truncate their host outputs",
+        config_path="section_memory",
+    )
+
+    group.add_argument(
+        "--truncated-lines",
+        type=int,
+        default=100,
+        help="How many lines of each host's output to show from sections bigger than --section-memory",
+        config_path="truncated_lines",
+    )
+
     group = parser.add_argument_group("debugging", config_path="debug")
 
     group.add_argument(
@@ -131,6 +341,20 @@ def parse_args() -> Namespace:
         help="Dump the default YAML configuration.",
     )
 
+    group.add_argument(
+        "--stats",
+        action="store_true",
+        help="Report per-phase timings and section counts to stderr",
+        config_path="stats",
+    )
+
+    group.add_argument(
+        "--stats-file",
+        type=FileType("w"),
+        help="Save per-phase timings and section counts to this JSON file",
+        config_path="stats_file",
+    )
+
     group.add_argument(
         "--log-level",
         "--ll",
@@ -141,34 +365,72 @@ def parse_args() -> Namespace:
 
     parser.add_argument(
         "input_file",
-        type=FileType("r"),
-        nargs="?",
-        default=sys.stdin,
-        help="Input log file to parse and display",
+        type=str,
+        nargs="*",
+        help="Input log files (or glob patterns) to parse and display, which may be gzip, bz2, xz or zstd compressed; the tasks of multiple logs are merged into one summary",
         config_path="input_file",
     )
 
     args = parser.parse_args()
+
+    if isinstance(args.input_file, str):  # (from a configuration file)
+        args.input_file = [args.input_file]
+    args.input_files = expand_input_files(args.input_file or [])
+    if args.compare and (len(args.input_files) != 2 or args.follow or args.json):
+        parser.error("--compare needs exactly two logs, and no --follow or --json")
+    if args.timings and (
+        len(args.input_files) > 1 or args.compare or args.follow or args.json
+    ):
+        parser.error("--timings only works with a single log, and no --follow or --json")
+    if args.last_runs is not None and (
+        args.last_runs < 1
+        or len(args.input_files) > 1
+        or args.compare
+        or args.follow
+        or args.checkpoint
+    ):
+        parser.error(
+            "--last-runs needs a positive count and a single log,"
+            " and no --follow or --checkpoint"
+        )
+    if len(args.input_files) > 1:
+        if args.follow:
+            parser.error("--follow only works with a single log")
+        for input_file in args.input_files:
+            if not os.access(input_file, os.R_OK):
+                parser.error(f"can't read '{input_file}'")
+    elif args.input_file and not args.input_files:
+        parser.error(f"no log files match {' '.join(args.input_file)}")
+    else:
+        try:
+            args.input_file = FileType("r")(
+                args.input_files[0] if args.input_files else "-"
+            )
+        except ArgumentTypeError as exception:
+            parser.error(str(exception))
+    for input_file in args.input_files:
+        # (pipes aren't peeked at, since that would consume their data)
+        if not os.path.isfile(input_file):
+            continue
+        compression = file_compression(input_file)
+        if compression and not can_decompress(compression):
+            parser.error(f"can't read '{input_file}': {ZSTD_MISSING}")
+    if (
+        args.checkpoint
+        and len(args.input_files) == 1
+        and not os.path.isfile(args.input_files[0])
+    ):
+        parser.error("--checkpoint only works with a log file")
     log_level = args.log_level.upper()
     handlers = []
     datefmt = None
     messagefmt = "%(levelname)-10s:\t%(message)s"
 
-    # see if we're rich
-    try:
-        handlers.append(
-            RichHandler(
-                rich_tracebacks=True,
-                tracebacks_show_locals=True,
-                console=Console(
-                    stderr=True, theme=Theme({"logging.level.success": "green"})
-                ),
-            )
-        )
+    # see if we're rich (without importing it until something is logged)
+    if find_spec("rich") is not None:
+        handlers.append(LazyRichHandler())
         datefmt = " "
         messagefmt = "%(message)s"
-    except Exception:
-        debug("failed to install RichHandler")
 
     logging.basicConfig(
         level=log_level, format=messagefmt, datefmt=datefmt, handlers=handlers
@@ -177,29 +439,114 @@ def parse_args() -> Namespace:
     return (args, parser.config)
 
 
+def process(
+    ansible_less: AnsibleLess, args: Namespace, streaming: bool = False
+) -> None:
+    """Process the input file with the engine selected by the arguments.
+
+    Output is batched into large writes unless `streaming`, when each
+    section is written as soon as it's printed (such as for a pager).
+    """
+    batched = nullcontext() if streaming else ansible_less.renderer.batched()
+    with batched:
+        if args.compare:
+            LogComparison(ansible_less).compare(*args.input_files)
+        elif len(args.input_files) > 1:
+            ansible_less.process_logs(args.input_files, args.jobs)
+        elif args.last_runs:
+            ansible_less.process_last_runs(args.input_file, args.last_runs)
+        elif args.timings:
+            # (the other engines skip sections whose timings are needed)
+            ansible_less.process(args.input_file)
+        elif args.checkpoint and args.input_file is not sys.stdin:
+            ansible_less.process_incremental(args.input_file, args.checkpoint)
+        elif args.index and args.input_file is not sys.stdin:
+            index = SectionIndex.load_or_build(
+                args.input_file.name, args.index_file, ansible_less.section_memory
+            )
+            if index is None:
+                # (empty and compressed logs can't be indexed)
+                ansible_less.process(args.input_file)
+            else:
+                ansible_less.process_indexed(args.input_file, index)
+        elif args.jobs > 1 and not args.json:
+            # note: JSON records may span chunks, so JSON output isn't parallelized
+            ansible_less.process_parallel(args.input_file, args.jobs)
+        elif args.mmap:
+            ansible_less.process_mmap(args.input_file)
+        else:
+            ansible_less.process(args.input_file)
+        if ansible_less.timings:
+            ansible_less.print_timings()
+    ansible_less.flush_output()
+
+
 def main():
     (args, config) = parse_args()
 
     if args.dump_config:
+        import yaml
+
         al = AnsibleLess()
         print(yaml.dump(al.config))
         exit()
 
-    # TODO(hardaker): clean this up
-    if not args.output_to and not args.stdout:
-        console = Console()
-        with console.pager():
-            ansible_less = AnsibleLess(config=config, output_to=console)
-            ansible_less.process(args.input_file)
-    else:
-        output_to = args.output_to
-        if args.stdout:
-            output_to = sys.stdout
-        ansible_less = AnsibleLess(config=config, output_to=output_to)
-        ansible_less.process(args.input_file)
+    stats = None
+    if args.stats or args.stats_file:
+        stats = Stats()
+
+    timings = None
+    if args.timings:
+        from ansible_less.timings import TaskTimings
+
+        timings = TaskTimings()
+
+    try:
+        if args.follow or args.json:
+            # followed and machine readable output go straight to stdout
+            ansible_less_class = AnsibleLessJSON if args.json else AnsibleLess
+            ansible_less = ansible_less_class(
+                config=config, output_to=args.output_to or sys.stdout, stats=stats
+            )
+            if args.follow:
+                try:
+                    ansible_less.follow(args.input_file, idle_timeout=args.idle_timeout)
+                except KeyboardInterrupt:
+                    pass
+            else:
+                process(ansible_less, args)
+        elif not args.output_to and not args.stdout and sys.stdout.isatty():
+            from ansible_less.pager import pager_output
+
+            # sections are streamed to the pager as they're printed
+            with pager_output() as output_to:
+                ansible_less = AnsibleLess(
+                    config=config, output_to=output_to, stats=stats, timings=timings
+                )
+                process(ansible_less, args, streaming=True)
+        else:
+            ansible_less = AnsibleLess(
+                config=config,
+                output_to=args.output_to or sys.stdout,
+                stats=stats,
+                timings=timings,
+            )
+            process(ansible_less, args)
+    except DecompressorMissingError as exception:
+        # (compressed files are checked up front, but stdin can't be)
+        sys.exit(f"{os.path.basename(sys.argv[0])}: error: {exception}")
+    except BrokenPipeError:
+        # stdout was closed early (such as by '| head'), so stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
 
     output_to = args.output_to
 
+    if args.stats:
+        stats.write(sys.stderr)
+    if args.stats_file:
+        json.dump(stats.report(), args.stats_file, indent=2)
+
 
 if __name__ == "__main__":
     main()